@@ -17,6 +17,14 @@ export const CONFIG = {
   // Obsidian vault location (if using Obsidian integration)
   VAULT_PATH: join(__dirname, 'data/vault'),
   
+  // Additional vaults/brain databases searched in parallel by unified_search
+  // (optional). Include this instance's own vault and database as a shard
+  // too, since configuring SHARDS replaces the single-vault search.
+  // SHARDS: [
+  //   { name: 'personal', vault_path: join(__dirname, 'data/vault'), brain_db_path: join(__dirname, 'data/brain/brain.db') },
+  //   { name: 'team', vault_path: '/srv/team-vault', brain_db_path: '/srv/team/brain.db', timeout: 5 }
+  // ],
+  
   // Monitoring ports
   MONITOR_PORT: 9996,
   API_PORT: 9998
@@ -30,6 +30,8 @@ const VAULT_PATH = CONFIG.VAULT_PATH;
 const BRAIN_NOTES_PATH = __dirname;  // Use current directory
 const PYTHON_PATH = CONFIG.PYTHON_PATH;
 const LOG_DIR = CONFIG.LOG_DIR;
+const SHARDS = CONFIG.SHARDS || [];  // Vaults/databases fanned out to by unified_search
+const PROFILE_RUNNER = path.join(__dirname, 'monitor', 'profile_runner.py');
 
 // Import crypto for future enhancements
 import crypto from 'crypto';
@@ -74,6 +76,65 @@ function executePythonViaSpawn(pythonCode, pythonPath = PYTHON_PATH) {
 }
 
 
+// Run Python that emits the NDJSON stream protocol (header, items, trailer).
+// Lines are parsed as they arrive, so stdout is never buffered as a whole.
+function executePythonNDJSON(pythonCode, pythonPath = PYTHON_PATH) {
+  return new Promise((resolve, reject) => {
+    const python = spawn(pythonPath, ['-'], { cwd: BRAIN_NOTES_PATH || __dirname });
+
+    let header = null;
+    let trailer = null;
+    const items = [];
+    let pending = '';
+    let stderr = '';
+
+    const handleLine = (line) => {
+      if (!line.trim()) return;
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        return;  // Ignore stray prints that are not part of the stream
+      }
+      if (message.type === 'item') {
+        items.push(message.data);
+      } else if (message.type === 'header') {
+        header = message;
+      } else if (message.type === 'trailer') {
+        trailer = message;
+      }
+    };
+
+    // Decode as a stream so multibyte characters split across chunks survive
+    python.stdout.setEncoding('utf8');
+    python.stdout.on('data', (data) => {
+      pending += data;
+      const lines = pending.split('\n');
+      pending = lines.pop();
+      for (const line of lines) handleLine(line);
+    });
+
+    python.stderr.on('data', (data) => {
+      stderr += data.toString();
+    });
+
+    python.on('close', (code) => {
+      handleLine(pending);
+      // A trailer (possibly carrying an error) means the stream is complete
+      if (!trailer) {
+        return reject(new Error(`Python stream ended without trailer (exit code ${code}): ${stderr}`));
+      }
+      resolve({ header, items, trailer, stderr });
+    });
+
+    python.on('error', (err) => {
+      reject(err);
+    });
+
+    python.stdin.write(pythonCode);
+    python.stdin.end();
+  });
+}
 
 // State table configuration
 const STATE_TABLE_NAME = 'brain_state';
@@ -210,6 +271,38 @@ function saveExecutionLog(execId, logEntry) {
   }
 }
 
+// Attach a saved profile to the execution log and summarize it for output
+function summarizeProfile(profilePath, logEntry) {
+  if (!profilePath || !fs.existsSync(profilePath)) {
+    return '';
+  }
+  
+  try {
+    const profile = JSON.parse(fs.readFileSync(profilePath, 'utf8'));
+    if (logEntry) {
+      logEntry.profile_file = path.basename(profilePath);
+      logEntry.peak_memory_bytes = profile.peak_memory_bytes;
+    }
+    
+    let summary = `\n\n🔬 Profile (${profile.mode || 'sampling'}, ${profile.samples} samples):\n`;
+    if (profile.timings_include_overhead) {
+      summary += `  • Timings include ${profile.instrumentation.filter(i => i !== 'stack_sampler').join(' + ')} overhead\n`;
+    }
+    if (profile.peak_memory_bytes != null) {
+      summary += `  • Peak memory (${profile.memory_source || 'tracemalloc'}): ${(profile.peak_memory_bytes / 1024 / 1024).toFixed(1)} MB\n`;
+    }
+    for (const fn of profile.top_functions.filter(f => f.file !== '~').slice(0, 5)) {
+      const detail = fn.ncalls != null ? `${fn.ncalls} calls` : `${fn.samples} samples`;
+      summary += `  • ${fn.function} (${path.basename(fn.file)}:${fn.line}): ${fn.cumtime.toFixed(3)}s cumulative, ${detail}\n`;
+    }
+    summary += `  • Full profile: /api/brain/executions/${logEntry ? logEntry.id : ''}/profile`;
+    return summary;
+  } catch (error) {
+    console.error('[Brain Unified] Error reading profile:', error);
+    return '';
+  }
+}
+
 const tools = [
   // ===== STATE MANAGEMENT TOOLS =====
   {
@@ -596,12 +689,23 @@ const tools = [
           type: 'boolean', 
           description: 'Return full output without filtering',
           default: false
+        },
+        profile: {
+          type: 'boolean',
+          description: 'Profile Python code with a low-overhead stack sampler',
+          default: false
+        },
+        profile_mode: {
+          type: 'string',
+          enum: ['sampling', 'memory', 'calls'],
+          description: 'sampling: stack samples only; memory: add tracemalloc allocation sites; calls: add cProfile call counts (timings then include instrumentation overhead)',
+          default: 'sampling'
         }
       },
       required: ['code']
     },
-    handler: async ({ code, language = 'auto', description, verbose = false }) => {
-      let execId, logEntry, startTime;
+    handler: async ({ code, language = 'auto', description, verbose = false, profile = false, profile_mode = 'sampling' }) => {
+      let execId, logEntry, startTime, profilePath;
       try {
         // Initialize output filter
         const filter = new OutputFilter({ 
@@ -629,8 +733,18 @@ const tools = [
         if (language === 'python') {
           output += `🐍 Executing python code: ${description || 'No description provided'}\n`;
           
+          const quotedCode = `'${code.replace(/'/g, "'\"'\"'")}'`;
+          let command = `python3 -c ${quotedCode}`;
+          if (profile) {
+            // Profile is saved next to the execution log
+            fs.mkdirSync(LOG_DIR, { recursive: true });
+            profilePath = path.join(LOG_DIR, `${execId}.profile.json`);
+            const runnerFlags = { memory: '--tracemalloc ', calls: '--cprofile ' }[profile_mode] || '';
+            command = `python3 '${PROFILE_RUNNER}' ${runnerFlags}'${profilePath}' ${quotedCode}`;
+          }
+          
           const { stdout, stderr } = await execAsync(
-            `python3 -c '${code.replace(/'/g, "'\"'\"'")}'`,
+            command,
             { maxBuffer: 10 * 1024 * 1024 }
           );
           
@@ -678,6 +792,7 @@ const tools = [
         
         const executionTime = Date.now() - startTime;
         output += `\n⏱️ Execution time: ${executionTime}ms`;
+        output += summarizeProfile(profilePath, logEntry);
         
         // Save execution log
         if (execId && logEntry) {
@@ -689,6 +804,8 @@ const tools = [
         
         return { content: [{ type: 'text', text: output }] };
       } catch (error) {
+        const profileSummary = summarizeProfile(profilePath, logEntry);
+        
         // Save error in execution log
         if (execId && logEntry) {
           logEntry.status = 'error';
@@ -700,7 +817,7 @@ const tools = [
         return { 
           content: [{ 
             type: 'text', 
-            text: `❌ Execution error: ${error.message}` 
+            text: `❌ Execution error: ${error.message}${profileSummary}` 
           }] 
         };
       }
@@ -1221,6 +1338,7 @@ const tools = [
 import sys
 sys.path.insert(0, '${BRAIN_NOTES_PATH}')
 from obsidian_integration.obsidian_note import ObsidianNote
+from obsidian_integration.ndjson_stream import write_ndjson
 import json
 
 note_tool = ObsidianNote(vault_path="${VAULT_PATH}")
@@ -1245,13 +1363,24 @@ try:
     elif action == 'delete':
         result = note_tool.delete(args.get('identifier'))
     elif action == 'list':
-        result = note_tool.list_notes(folder=args.get('folder'))
+        # Streamed; only the fields and notes the listing shows are built
+        write_ndjson('notes', note_tool.iter_notes(
+            folder=args.get('folder'),
+            fields=['identifier', 'path'],
+            limit=None if args.get('verbose') else 50
+        ))
+        result = None
     else:
         result = {"error": f"Unknown action: {action}"}
     
-    print(json.dumps(result))
+    if result is not None:
+        print(json.dumps(result))
 except Exception as e:
-    print(json.dumps({"error": str(e)}))
+    if action == 'list':
+        # End the stream so the error reaches the caller
+        print(json.dumps({"type": "trailer", "emitted": 0, "error": str(e)}))
+    else:
+        print(json.dumps({"error": str(e)}))
 `;
 
       try {
@@ -1260,13 +1389,19 @@ except Exception as e:
         // console.log(pythonCode);
         // console.log("==================================");
         
-        const { stdout, stderr } = await executePythonViaSpawn(pythonCode);
-        
-        if (stderr && !stderr.includes('Warning')) {
-          console.error(`Obsidian tool stderr: ${stderr}`);
+        let result;
+        if (args.action === 'list') {
+          const stream = await executePythonNDJSON(pythonCode);
+          result = { notes: stream.items, total: stream.trailer.total, error: stream.trailer.error };
+        } else {
+          const { stdout, stderr } = await executePythonViaSpawn(pythonCode);
+          
+          if (stderr && !stderr.includes('Warning')) {
+            console.error(`Obsidian tool stderr: ${stderr}`);
+          }
+          
+          result = JSON.parse(stdout);
         }
-        
-        const result = JSON.parse(stdout);
         let output = `📝 Obsidian ${args.action} action\\n\\n`;
         
         if (result.error) {
@@ -1314,14 +1449,15 @@ except Exception as e:
               break;
             case 'list':
               const notesList = result.notes || [];
+              const totalNotes = result.total ?? notesList.length;
               
-              if (!args.verbose && notesList.length > 50) {
-                output += `📚 Found ${notesList.length} notes (showing first 50):\\n`;
+              if (!args.verbose && totalNotes > 50) {
+                output += `📚 Found ${totalNotes} notes (showing first 50):\\n`;
                 for (const note of notesList.slice(0, 50)) {
                   output += `  • ${note.identifier} (${note.path})\\n`;
                 }
                 output += `\\n📊 List filtering:\\n`;
-                output += `  • Total notes: ${notesList.length}\\n`;
+                output += `  • Total notes: ${totalNotes}\\n`;
                 output += `  • Displayed: 50\\n`;
                 output += `  • Use verbose: true for full list`;
               } else {
@@ -1355,6 +1491,12 @@ except Exception as e:
         query: { type: 'string' },
         limit: { type: 'number', default: 20 },
         source: { type: 'string', enum: ['all', 'brain', 'obsidian'], default: 'all' },
+        mode: {
+          type: 'string',
+          enum: ['keyword', 'semantic'],
+          description: 'keyword: substring/FTS5 match; semantic: offline TF-IDF similarity',
+          default: 'keyword'
+        },
         verbose: { 
           type: 'boolean', 
           description: 'Return full results without filtering',
@@ -1363,7 +1505,7 @@ except Exception as e:
       },
       required: ['query']
     },
-    handler: async ({ query, limit = 20, source = 'all', verbose = false }) => {
+    handler: async ({ query, limit = 20, source = 'all', mode = 'keyword', verbose = false }) => {
       // Escape query to prevent Python injection
       const escapedQuery = query.replace(/\\/g, '\\\\').replace(/"/g, '\\"');
       
@@ -1376,16 +1518,23 @@ warnings.filterwarnings('ignore')
 sys.path.insert(0, '${BRAIN_NOTES_PATH}')
 
 try:
-    from obsidian_integration.unified_search import UnifiedSearch
-    searcher = UnifiedSearch(brain_db_path="${BRAIN_DB_PATH}", vault_path="${VAULT_PATH}")
+    shards = json.loads(${JSON.stringify(JSON.stringify(SHARDS))})
+    if shards:
+        from obsidian_integration.sharded import ShardedBrain
+        searcher = ShardedBrain(shards)
+    else:
+        from obsidian_integration.unified_search import UnifiedSearch
+        searcher = UnifiedSearch(brain_db_path="${BRAIN_DB_PATH}", vault_path="${VAULT_PATH}")
     
-    results = searcher.search("${escapedQuery}", limit=${limit}, source="${source}")
+    results = searcher.search("${escapedQuery}", limit=${limit}, source="${source}", mode="${mode === 'semantic' ? 'semantic' : 'keyword'}")
     
     # Use results directly from UnifiedSearch
     output = {
         "brain_count": results.get("brain_count", 0),
         "obsidian_count": results.get("obsidian_count", 0),
-        "merged": results.get("merged", [])[:10]
+        "merged": results.get("merged", [])[:10],
+        "shards": results.get("shards", {}),
+        "notice": results.get("notice")
     }
     
     print(json.dumps(output))
@@ -1476,7 +1625,14 @@ except Exception as e:
         if (results.error) {
           output += `❌ Error: ${results.error}\\n`;
         } else {
-          output += `📊 Found: ${results.brain_count} Brain | ${results.obsidian_count} Obsidian\\n\\n`;
+          if (results.notice) {
+            output += `ℹ️ ${results.notice}\\n`;
+          }
+          output += `📊 Found: ${results.brain_count} Brain | ${results.obsidian_count} Obsidian\\n`;
+          for (const [name, shard] of Object.entries(results.shards || {})) {
+            output += `  • ${name}: ${shard.status}${shard.status === 'ok' ? ` (${shard.count} results, ${shard.elapsed}s)` : shard.error ? ` (${shard.error})` : ''}\\n`;
+          }
+          output += '\\n';
           
           if (results.merged && results.merged.length > 0) {
             const displayLimit = verbose ? results.merged.length : 10;
@@ -1491,6 +1647,9 @@ except Exception as e:
                 output += `\\n${i+1}. 📝 ${result.title}\\n`;
                 output += `   Path: ${result.path}\\n`;
               }
+              if (result.shard) {
+                output += `   Shard: ${result.shard}\\n`;
+              }
               output += `   Score: ${result.final_score?.toFixed(3) || 'N/A'}\\n`;
             }
             
@@ -1517,6 +1676,94 @@ except Exception as e:
     }
   },
   
+  {
+    name: 'obsidian_sync',
+    description: 'Incrementally sync Brain memories and Obsidian notes in both directions',
+    inputSchema: {
+      type: 'object',
+      properties: {
+        memory_types: {
+          type: 'array',
+          items: { type: 'string' },
+          description: 'Memory types mirrored into the vault',
+          default: []
+        },
+        note_folders: {
+          type: 'array',
+          items: { type: 'string' },
+          description: 'Vault folders imported as memories',
+          default: []
+        },
+        direction: { type: 'string', enum: ['both', 'to_vault', 'to_brain'], default: 'both' },
+        dry_run: { type: 'boolean', description: 'Report changes without writing', default: false },
+        prefer: {
+          type: 'string',
+          enum: ['brain', 'vault'],
+          description: 'Resolve conflicts in favour of this side instead of holding them back'
+        }
+      }
+    },
+    handler: async ({ memory_types = [], note_folders = [], direction = 'both', dry_run = false, prefer = null }) => {
+      const pythonCode = `
+import sys
+import json
+
+sys.path.insert(0, '${BRAIN_NOTES_PATH}')
+
+try:
+    from obsidian_integration.vault_sync import VaultSync
+    args = json.loads(${JSON.stringify(JSON.stringify({ memory_types, note_folders, direction, dry_run, prefer }))})
+    syncer = VaultSync(
+        brain_db_path="${BRAIN_DB_PATH}",
+        vault_path="${VAULT_PATH}",
+        memory_types=args["memory_types"],
+        note_folders=args["note_folders"]
+    )
+    print(json.dumps(syncer.sync(direction=args["direction"], dry_run=args["dry_run"], prefer=args["prefer"])))
+except Exception as e:
+    print(json.dumps({"error": str(e)}))
+`;
+
+      try {
+        const { stdout, stderr } = await executePythonViaSpawn(pythonCode);
+        
+        if (stderr) {
+          console.error(`Obsidian sync stderr: ${stderr}`);
+        }
+        
+        const result = JSON.parse(stdout);
+        let output = `🔄 Obsidian sync (${direction}${dry_run ? ', dry run' : ''})\\n\\n`;
+        
+        if (result.error) {
+          output += `❌ Error: ${result.error}`;
+        } else {
+          const verb = dry_run ? 'Would write' : 'Wrote';
+          output += `📝 ${verb} ${result.to_vault.written.length} notes (${result.to_vault.unchanged} unchanged)\\n`;
+          output += `🧠 ${verb} ${result.to_brain.written.length} memories (${result.to_brain.unchanged} unchanged)\\n`;
+          if (result.kept.length > 0) {
+            output += `📌 Kept ${result.kept.length} brain versions over edited notes\\n`;
+          }
+          
+          if (result.conflicts.length > 0) {
+            output += `\\n⚠️ Conflicts (${result.conflicts.length}):\\n`;
+            for (const conflict of result.conflicts.slice(0, 20)) {
+              output += `  • ${conflict.key} ↔ ${conflict.path}: ${conflict.reason}\\n`;
+            }
+          }
+        }
+        
+        return { content: [{ type: 'text', text: output }] };
+      } catch (error) {
+        return { 
+          content: [{ 
+            type: 'text', 
+            text: `❌ Sync error: ${error.message}` 
+          }] 
+        };
+      }
+    }
+  },
+  
   {
     name: 'brain_analyze',
     description: 'Analyze Obsidian vault for insights, connections, and patterns',
@@ -1525,13 +1772,18 @@ except Exception as e:
       properties: {
         analysis_type: { 
           type: 'string', 
-          enum: ['full', 'connections', 'orphans', 'patterns', 'insights'],
+          enum: ['full', 'connections', 'orphans', 'patterns', 'insights', 'duplicates'],
           default: 'full'
         },
-        save_report: { type: 'boolean', default: false }
+        save_report: { type: 'boolean', default: false },
+        threshold: {
+          type: 'number',
+          description: 'Similarity threshold for duplicates analysis (0-1)',
+          default: 0.8
+        }
       }
     },
-    handler: async ({ analysis_type = 'full', save_report = false }) => {
+    handler: async ({ analysis_type = 'full', save_report = false, threshold = 0.8 }) => {
       // DEBUG: Proof of life logging
       fs.appendFileSync(DEBUG_LOG_FILE, `\n=== BRAIN_ANALYZE HANDLER CALLED ===\n`);
       fs.appendFileSync(DEBUG_LOG_FILE, `Time: ${new Date().toISOString()}\n`);
@@ -1550,36 +1802,55 @@ sys.path.insert(0, '${BRAIN_NOTES_PATH}')
 
 try:
     from obsidian_integration.brain_analyzer import BrainAnalyzer
-    analyzer = BrainAnalyzer(vault_path="${VAULT_PATH}")
-    results = analyzer.full_analysis()
+    from obsidian_integration.ndjson_stream import write_ndjson
+    analysis_type = "${analysis_type}"
+    shards = json.loads(${JSON.stringify(JSON.stringify(SHARDS))})
+    if shards:
+        from obsidian_integration.sharded import ShardedBrain
+        sharded = ShardedBrain(shards)
+    else:
+        analyzer = BrainAnalyzer(vault_path="${VAULT_PATH}", brain_db_path="${BRAIN_DB_PATH}")
     
-    if "${analysis_type}" == "full":
-        # Get connections dict first
-        connections_dict = results.get("connections", {}).get("connections", {})
-        top_hubs_list = list(connections_dict.items())[:5]
-        
+    # Streamed analyses: (sections, per-section limit, connection fields, linked notes only)
+    stream_plans = {
+        "full": (["patterns", "hubs", "insights"], 5, None, False),
+        "connections": (["connections"], 50, ["note", "link_count", "links"], True),
+        "orphans": (["orphans"], 20, None, False),
+        "patterns": (["patterns"], None, None, False),
+        "insights": (["insights"], None, None, False)
+    }
+    
+    if analysis_type == "duplicates":
+        options = dict(threshold=${Number(threshold) || 0.8},
+                       save_report=${save_report ? 'True' : 'False'})
+        if shards:
+            analysis = sharded.analyze("duplicates", **options)
+            duplicates = analysis["aggregate"].get("duplicates", {
+                "clusters": [], "cluster_count": 0, "duplicate_count": 0, "documents_scanned": 0
+            })
+        else:
+            duplicates = analyzer.find_duplicates(**options)
         output = {
-            "stats": results.get("patterns", {}),
-            "insights": results.get("insights", {}).get("insights", [])[:3],
-            "orphan_count": len(results.get("orphans", {}).get("orphans", [])),
-            "hub_count": len(connections_dict),
-            "top_hubs": top_hubs_list
+            "duplicates": duplicates["clusters"][:20],
+            "cluster_count": duplicates["cluster_count"],
+            "duplicate_count": duplicates["duplicate_count"],
+            "documents_scanned": duplicates["documents_scanned"],
+            "shards": analysis["shards"] if shards else {}
         }
-    elif "${analysis_type}" == "connections":
-        output = {"connections": results.get("connections", {})}
-    elif "${analysis_type}" == "orphans":
-        orphans_list = results.get("orphans", {}).get("orphans", [])
-        output = {"orphans": orphans_list[:20]}
-    elif "${analysis_type}" == "patterns":
-        output = results.get("patterns", {})
-    elif "${analysis_type}" == "insights":
-        output = {"insights": results.get("insights", {}).get("insights", [])}
+        print(json.dumps(output))
+    elif analysis_type in stream_plans:
+        sections, limit, fields, linked_only = stream_plans[analysis_type]
+        if shards:
+            # Aggregated across shards; notes are prefixed with their shard
+            items = sharded.iter_analysis(analysis_type, limit)
+        else:
+            items = analyzer.iter_analysis(sections, limit, fields, linked_only)
+        write_ndjson("analysis", items, header={"analysis_type": analysis_type})
     else:
-        output = {"error": "Unknown analysis type"}
-    
-    print(json.dumps(output))
+        print(json.dumps({"type": "trailer", "emitted": 0, "error": "Unknown analysis type"}))
 except Exception as e:
     error_report = {
+        "type": "trailer",
         "error": "Python execution failed",
         "exception_type": str(type(e).__name__),
         "exception_message": str(e),
@@ -1595,35 +1866,64 @@ except Exception as e:
         // console.log(pythonCode);
         // console.log("=====================================");
         
-        const { stdout, stderr } = await executePythonViaSpawn(pythonCode);
-        
-        // Only log stderr if it's not just warnings
-        if (stderr) {
-          console.error(`Brain analyze stderr: ${stderr}`);
-        }
+        let results;
+        if (analysis_type !== 'duplicates') {
+          // Streamed: rebuild the display object from section items
+          const stream = await executePythonNDJSON(pythonCode);
+          if (stream.stderr) {
+            console.error(`Brain analyze stderr: ${stream.stderr}`);
+          }
+          
+          const section = (name) => stream.items.filter(item => item.section === name);
+          const trailer = stream.trailer;
+          results = {
+            error: trailer.error,
+            stats: section('patterns')[0],
+            patterns: section('patterns')[0],
+            insights: section('insights'),
+            top_hubs: section('hubs'),
+            connections: section('connections'),
+            orphans: section('orphans').map(item => item.note),
+            total_notes: trailer.total_notes || 0,
+            total_links: trailer.total_links || 0,
+            linked_notes: trailer.linked_notes || 0,
+            orphan_count: trailer.orphan_count || 0,
+            shards: trailer.shards || {}
+          };
+        } else {
+          const { stdout, stderr } = await executePythonViaSpawn(pythonCode);
         
-        // Debug: Log raw stdout
-        // console.log("=== RAW STDOUT ===");
-        // console.log(stdout);
-        // console.log("==================");
+          // Only log stderr if it's not just warnings
+          if (stderr) {
+            console.error(`Brain analyze stderr: ${stderr}`);
+          }
         
-        // Try to extract JSON from stdout
-        let results;
-        try {
-          // Find the last valid JSON in the output
-          const jsonMatch = stdout.match(/\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}/g);
-          if (jsonMatch) {
-            results = JSON.parse(jsonMatch[jsonMatch.length - 1]);
-          } else {
-            throw new Error('No valid JSON found in output');
+          // Try to extract JSON from stdout
+          try {
+            // The result is the last line printed; shard statuses nest too deep for a regex
+            const lastLine = stdout.trim().split('\n').pop();
+            if (lastLine && lastLine.startsWith('{')) {
+              results = JSON.parse(lastLine);
+            } else {
+              throw new Error('No valid JSON found in output');
+            }
+          } catch (parseError) {
+            console.error('Failed to parse output:', stdout);
+            results = { error: 'Failed to parse analysis results' };
           }
-        } catch (parseError) {
-          console.error('Failed to parse output:', stdout);
-          results = { error: 'Failed to parse analysis results' };
         }
         
         let output = `🧠 Vault Analysis (${analysis_type})\\n\\n`;
         
+        const shardStatuses = Object.entries(results.shards || {});
+        if (shardStatuses.length > 0) {
+          output += '🗂️ Shards:\\n';
+          for (const [name, shard] of shardStatuses) {
+            output += `  • ${name}: ${shard.status}${shard.error ? ` (${shard.error})` : ` (${shard.elapsed}s)`}\\n`;
+          }
+          output += '\\n';
+        }
+        
         if (results.error) {
           output += `❌ Error: ${results.error}`;
         } else {
@@ -1631,17 +1931,17 @@ except Exception as e:
             case 'full':
               output += '📊 Statistics:\\n';
               if (results.stats) {
-                output += `  • Total notes: ${results.stats.total_notes || 0}\\n`;
+                output += `  • Total notes: ${results.total_notes}\\n`;
                 output += `  • Total words: ${(results.stats.total_words || 0).toLocaleString()}\\n`;
-                output += `  • Avg links/note: ${(results.stats.avg_links_per_note || 0).toFixed(1)}\\n`;
+                output += `  • Avg links/note: ${(results.total_notes ? results.total_links / results.total_notes : 0).toFixed(1)}\\n`;
               }
               output += `  • Orphan notes: ${results.orphan_count || 0}\\n`;
-              output += `  • Hub notes: ${results.hub_count || 0}\\n\\n`;
+              output += `  • Hub notes: ${results.top_hubs.length}\\n\\n`;
               
               if (results.insights && results.insights.length > 0) {
                 output += '💡 Insights:\\n';
-                for (const insight of results.insights) {
-                  output += `  • ${insight}\\n`;
+                for (const insight of results.insights.slice(0, 3)) {
+                  output += `  • ${insight.shard ? `[${insight.shard}] ` : ''}${insight.message}\\n`;
                 }
               }
               
@@ -1654,19 +1954,16 @@ except Exception as e:
               break;
               
             case 'connections':
-              if (results.suggestions && results.suggestions.length > 0) {
-                output += '🔗 Connection Suggestions:\\n';
-                for (const suggestion of results.suggestions) {
-                  output += `  • ${suggestion}\\n`;
-                }
-              } else {
-                output += '❌ No connection suggestions found';
+              output += `🔗 ${results.total_links} links across ${results.total_notes} notes`;
+              output += `${results.linked_notes > results.connections.length ? ` (showing ${results.connections.length} of ${results.linked_notes} linking notes)` : ''}:\\n`;
+              for (const connection of results.connections) {
+                output += `  • ${connection.note} → ${connection.links.join(', ')}\\n`;
               }
               break;
               
             case 'orphans':
               if (results.orphans && results.orphans.length > 0) {
-                output += `📝 Orphan Notes (${results.orphans.length}):\\n`;
+                output += `📝 Orphan Notes (${results.orphan_count}${results.orphan_count > results.orphans.length ? `, showing ${results.orphans.length}` : ''}):\\n`;
                 for (const orphan of results.orphans) {
                   output += `  • ${orphan}\\n`;
                 }
@@ -1677,14 +1974,26 @@ except Exception as e:
               
             case 'patterns':
               output += '🔍 Patterns Found:\\n';
-              output += JSON.stringify(results, null, 2);
+              output += JSON.stringify(results.patterns, null, 2);
+              break;
+              
+            case 'duplicates':
+              output += `📑 Scanned ${results.documents_scanned || 0} notes and memories\\n`;
+              if (results.duplicates && results.duplicates.length > 0) {
+                output += `🔁 ${results.cluster_count} duplicate clusters, ${results.duplicate_count} to merge:\\n`;
+                for (const cluster of results.duplicates) {
+                  output += `  • keep ${cluster.keep} ← ${cluster.merge.join(', ')} (${cluster.max_similarity})\\n`;
+                }
+              } else {
+                output += '✅ No near-duplicates found!';
+              }
               break;
               
             case 'insights':
               if (results.insights && results.insights.length > 0) {
                 output += '💡 All Insights:\\n';
                 for (const insight of results.insights) {
-                  output += `  • ${insight}\\n`;
+                  output += `  • ${insight.shard ? `[${insight.shard}] ` : ''}${insight.message}\\n`;
                 }
               } else {
                 output += '❌ No insights generated';
@@ -1750,6 +2059,7 @@ Available commands:
 📝 OBSIDIAN INTEGRATION
   obsidian_note - Create/read/update/delete notes
   unified_search - Search Brain + Obsidian
+  obsidian_sync - Sync memories and notes incrementally
   brain_analyze - Analyze vault patterns/insights
 
 ❓ brain_help - Show this help
@@ -1855,6 +2165,9 @@ Parameters:
 - code (required): Code to execute
 - language: "python", "shell", or "auto" (default: "auto")
 - description: What this code does
+- profile: Profile Python code; saved next to the execution log (default: false)
+- profile_mode: "sampling" (default, low overhead), "memory" (adds tracemalloc)
+  or "calls" (adds cProfile); the last two slow the code down
 
 Examples:
 // Python
@@ -1874,7 +2187,8 @@ brain_execute {
 Notes:
 - Auto-detects language from code patterns
 - Logs all executions with timestamps
-- Returns output, errors, and execution time`;
+- Returns output, errors, and execution time
+- Profiles are served at /api/brain/executions/{id}/profile and /flamegraph`;
             break;
             
           case 'state_set':
@@ -1996,6 +2310,31 @@ Returns:
 - Relevance scores`;
             break;
             
+          case 'obsidian_sync':
+            helpText = `🔄 obsidian_sync - Sync Brain memories and Obsidian notes
+
+Mirror memory types into the vault and vault folders into memories.
+Only memories and notes changed since the last sync are touched.
+
+Parameters:
+- memory_types: Memory types to write as notes under Brain-Memories/
+- note_folders: Vault folders to store as "obsidian:<path>" memories
+- direction: "both", "to_vault" or "to_brain" (default: "both")
+- dry_run: Report changes without writing (default: false)
+- prefer: "brain" or "vault" to resolve conflicts in favour of that side
+
+Example:
+obsidian_sync {
+  "memory_types": ["project"],
+  "note_folders": ["Session-Summaries"],
+  "dry_run": true
+}
+
+Returns:
+- Notes and memories written
+- Conflicts where both sides changed since the last sync (held back unless prefer is set)`;
+            break;
+            
           case 'brain_analyze':
             helpText = `🔬 brain_analyze - Analyze vault patterns
 
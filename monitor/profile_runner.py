@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Brain Execution Profiler
+
+Runs a brain_execute Python snippet under a low-overhead stack sampler and
+writes the profile JSON next to the execution log. Peak memory comes from
+the process's max RSS. Heavier instrumentation is opt-in, and the profile
+records whether its timings include that overhead:
+
+    --tracemalloc  allocation sites and traced peak memory
+    --cprofile     exact call counts and per-function times
+
+Usage: python3 profile_runner.py [--tracemalloc] [--cprofile] <profile_path> <code>
+"""
+
+import builtins
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CODE_FILENAME = '<brain_execute>'
+SAMPLE_INTERVAL = 0.005
+TOP_N = 25
+
+
+class StackSampler(threading.Thread):
+    """Periodically sample the main thread's stack into collapsed stacks."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.functions = Counter()
+        self.self_samples = Counter()
+        self.samples = 0
+        self.ticks = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.ticks += 1
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            functions = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                functions.append((code.co_filename, code.co_firstlineno, code.co_name))
+                if code.co_filename == CODE_FILENAME and code.co_name == '<module>':
+                    break
+                frame = frame.f_back
+            else:
+                # Sampled outside the user's code (profiler setup/teardown)
+                continue
+            self.stacks[';'.join(reversed(stack))] += 1
+            # Recursive functions count once per sample
+            self.functions.update(set(functions))
+            self.self_samples[functions[0]] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def sampled_functions(sampler, wall_time, limit=TOP_N):
+    """Top functions by estimated cumulative time from stack samples."""
+    seconds_per_tick = wall_time / sampler.ticks if sampler.ticks else sampler.interval
+    rows = []
+    for (filename, lineno, name), count in sampler.functions.most_common(limit):
+        rows.append({
+            'function': name,
+            'file': filename,
+            'line': lineno,
+            'samples': count,
+            'self_samples': sampler.self_samples[(filename, lineno, name)],
+            'tottime': round(sampler.self_samples[(filename, lineno, name)] * seconds_per_tick, 6),
+            'cumtime': round(count * seconds_per_tick, 6)
+        })
+    return rows
+
+
+def top_functions(profiler, limit=TOP_N):
+    """Top functions by cumulative time from cProfile stats."""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, lineno, name), (cc, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': name,
+            'file': filename,
+            'line': lineno,
+            'ncalls': ncalls,
+            'primitive_calls': cc,
+            'tottime': round(tottime, 6),
+            'cumtime': round(cumtime, 6)
+        })
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:limit]
+
+
+def top_allocations(snapshot, limit=10):
+    """Largest allocation sites still alive at the end of the run."""
+    stats = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]).statistics('lineno')
+    return [{
+        'file': stat.traceback[0].filename,
+        'line': stat.traceback[0].lineno,
+        'size_bytes': stat.size,
+        'count': stat.count
+    } for stat in stats[:limit]]
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def main():
+    args = sys.argv[1:]
+    flags = set()
+    while args and args[0] in ('--cprofile', '--tracemalloc'):
+        flags.add(args.pop(0))
+    if len(args) < 2:
+        print("Usage: python3 profile_runner.py [--tracemalloc] [--cprofile] <profile_path> <code>",
+              file=sys.stderr)
+        sys.exit(2)
+    use_cprofile = '--cprofile' in flags
+    use_tracemalloc = '--tracemalloc' in flags
+
+    profile_path, source = args[0], args[1]
+    # Match what the snippet would see under `python3 -c`
+    sys.argv = ['-c']
+    sys.path[0] = ''
+    code = compile(source, CODE_FILENAME, 'exec')
+    namespace = {'__name__': '__main__', '__builtins__': builtins}
+
+    profiler = cProfile.Profile() if use_cprofile else None
+    sampler = StackSampler(threading.get_ident())
+    error = None
+
+    if use_tracemalloc:
+        tracemalloc.start()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            exec(code, namespace)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    except BaseException as e:
+        error = e
+    wall_time = time.perf_counter() - start
+    sampler.stop()
+
+    instrumentation = ['stack_sampler']
+    memory = {'memory_source': 'rss', 'peak_memory_bytes': peak_rss_bytes()}
+    if use_tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        instrumentation.append('tracemalloc')
+        memory = {
+            'memory_source': 'tracemalloc',
+            'peak_memory_bytes': peak,
+            'current_memory_bytes': current,
+            'top_allocations': top_allocations(snapshot)
+        }
+    if use_cprofile:
+        instrumentation.append('cprofile')
+
+    profile = {
+        'mode': 'deterministic' if use_cprofile else 'sampling',
+        'instrumentation': instrumentation,
+        # tracemalloc hooks every allocation and cProfile every call; either
+        # can slow Python-heavy code many times over
+        'timings_include_overhead': use_cprofile or use_tracemalloc,
+        'wall_time': round(wall_time, 6),
+        **memory,
+        'sample_interval': SAMPLE_INTERVAL,
+        'samples': sampler.samples,
+        'collapsed': [f"{stack} {count}" for stack, count in sampler.stacks.most_common()],
+        'top_functions': top_functions(profiler) if use_cprofile else sampled_functions(sampler, wall_time),
+        'status': 'error' if error is not None and not isinstance(error, SystemExit) else 'completed'
+    }
+    try:
+        with open(profile_path, 'w') as f:
+            json.dump(profile, f, indent=2)
+    except OSError as e:
+        print(f"Could not save profile: {e}", file=sys.stderr)
+
+    if error is not None:
+        raise error
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,7 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 LOG_DIR = os.path.join(PROJECT_ROOT, "data", "logs", "execution")
 PORT = 9998
+PROFILE_SUFFIX = ".profile.json"
 
 class LogAPIHandler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -36,6 +37,8 @@ class LogAPIHandler(BaseHTTPRequestHandler):
                     "/health - API health check",
                     "/api/brain/executions - List recent executions",
                     "/api/brain/executions/{id} - Get specific execution log",
+                    "/api/brain/executions/{id}/profile - Get profile (top functions, memory, collapsed stacks)",
+                    "/api/brain/executions/{id}/flamegraph - Get flamegraph-ready stack tree",
                 ],
                 "log_dir": LOG_DIR
             }).encode())
@@ -43,6 +46,11 @@ class LogAPIHandler(BaseHTTPRequestHandler):
         elif parsed_path.path == '/api/brain/executions':
             self.handle_list_executions()
             
+        elif parsed_path.path.startswith('/api/brain/executions/') and \
+                parsed_path.path.endswith(('/profile', '/flamegraph')):
+            parts = parsed_path.path.split('/')
+            self.handle_get_profile(parts[-2], flamegraph=parts[-1] == 'flamegraph')
+            
         elif parsed_path.path.startswith('/api/brain/executions/'):
             execution_id = parsed_path.path.split('/')[-1]
             self.handle_get_execution(execution_id)
@@ -63,7 +71,7 @@ class LogAPIHandler(BaseHTTPRequestHandler):
             os.makedirs(LOG_DIR, exist_ok=True)
             
             # Find all execution logs
-            log_files = glob.glob(os.path.join(LOG_DIR, "exec-*.json"))
+            log_files = execution_log_files()
             executions = []
             
             # Sort by modification time, newest first
@@ -81,6 +89,7 @@ class LogAPIHandler(BaseHTTPRequestHandler):
                         "language": data.get('language', data.get('type', 'unknown')),
                         "status": data.get('status', 'completed'),
                         "description": data.get('description', ''),
+                        "profiled": bool(data.get('profile_file')),
                         "file": os.path.basename(log_file)
                     }
                     executions.append(execution)
@@ -111,7 +120,7 @@ class LogAPIHandler(BaseHTTPRequestHandler):
             ]
             
             # Also search by ID in files
-            for file in glob.glob(os.path.join(LOG_DIR, "exec-*.json")):
+            for file in execution_log_files():
                 try:
                     with open(file, 'r') as f:
                         data = json.load(f)
@@ -134,6 +143,54 @@ class LogAPIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.wfile.write(json.dumps({"error": str(e)}).encode())
 
+    def handle_get_profile(self, execution_id, flamegraph=False):
+        """Get the saved profile for an execution"""
+        try:
+            profile_path = os.path.join(LOG_DIR, f"{os.path.basename(execution_id)}{PROFILE_SUFFIX}")
+            if not os.path.exists(profile_path):
+                self.wfile.write(json.dumps({"error": "Profile not found"}).encode())
+                return
+            
+            with open(profile_path, 'r') as f:
+                profile = json.load(f)
+            
+            if flamegraph:
+                self.wfile.write(json.dumps({
+                    "execution_id": execution_id,
+                    "samples": profile.get('samples', 0),
+                    "sample_interval": profile.get('sample_interval'),
+                    "collapsed": '\n'.join(profile.get('collapsed', [])),
+                    "tree": collapsed_to_tree(profile.get('collapsed', []))
+                }).encode())
+            else:
+                profile['execution_id'] = execution_id
+                self.wfile.write(json.dumps(profile).encode())
+            
+        except Exception as e:
+            self.wfile.write(json.dumps({"error": str(e)}).encode())
+
+def execution_log_files():
+    """Execution log files, excluding saved profiles"""
+    return [f for f in glob.glob(os.path.join(LOG_DIR, "exec-*.json"))
+            if not f.endswith(PROFILE_SUFFIX)]
+
+def collapsed_to_tree(collapsed):
+    """Convert collapsed stack lines into a d3-flame-graph style tree"""
+    root = {"name": "root", "value": 0, "children": []}
+    for line in collapsed:
+        stack, _, count = line.rpartition(' ')
+        count = int(count)
+        root["value"] += count
+        node = root
+        for frame in stack.split(';'):
+            child = next((c for c in node["children"] if c["name"] == frame), None)
+            if child is None:
+                child = {"name": frame, "value": 0, "children": []}
+                node["children"].append(child)
+            child["value"] += count
+            node = child
+    return root
+
 def run_server():
     """Run the API server"""
     server = HTTPServer(('localhost', PORT), LogAPIHandler)
@@ -2,16 +2,38 @@
 Brain Analyzer for Obsidian Vault
 """
 import json
+import hashlib
+import os
+import random
+import sqlite3
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Generator
 from collections import defaultdict, Counter
 import re
 import datetime
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .ndjson_stream import project
+except ImportError:
+    from ndjson_stream import project
+
+
+# MinHash permutations are (a * h + b) mod p over 32-bit shingle hashes
+MINHASH_PRIME = (1 << 61) - 1
+
+# Reports this analyzer writes into the vault root; never analysed as notes
+REPORT_FILES = ('_analysis_report.md', '_duplicates_report.md')
+
 
 class BrainAnalyzer:
-    def __init__(self, vault_path: str):
+    def __init__(self, vault_path: str, brain_db_path: Optional[str] = None):
         self.vault_path = Path(vault_path)
+        self.brain_db_path = brain_db_path
     
     def _parse_frontmatter(self, content: str) -> tuple[Dict[str, Any], str]:
         """Parse frontmatter from markdown content."""
@@ -67,6 +89,223 @@ class BrainAnalyzer:
             'total_links': sum(len(links) for links in connections.values())
         }
     
+    def _words(self, text: str) -> List[str]:
+        """Lowercase words of a note body."""
+        return re.findall(r'\b\w+\b', text.lower())
+
+    def _shingles(self, text: str, size: int = 5) -> set:
+        """Hash word n-gram shingles of text to 32-bit integers."""
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < size:
+            grams = [' '.join(words)] if words else []
+        else:
+            grams = (' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+        return {
+            int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little')
+            for g in grams
+        }
+
+    def _minhash_params(self, num_perm: int) -> Tuple[List[int], List[int]]:
+        """Fixed permutation coefficients so cached signatures stay comparable."""
+        rng = random.Random(1)
+        a = [rng.randrange(1, 1 << 31) for _ in range(num_perm)]
+        b = [rng.randrange(0, 1 << 31) for _ in range(num_perm)]
+        return a, b
+
+    def _minhash(self, shingles: set, a: List[int], b: List[int]) -> List[int]:
+        """Compute the MinHash signature of a shingle set."""
+        if not shingles:
+            return [MINHASH_PRIME] * len(a)
+        if np is not None:
+            h = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+            a_arr = np.asarray(a, dtype=np.uint64)[:, None]
+            b_arr = np.asarray(b, dtype=np.uint64)[:, None]
+            return ((a_arr * h + b_arr) % np.uint64(MINHASH_PRIME)).min(axis=1).tolist()
+        return [min((ai * h + bi) % MINHASH_PRIME for h in shingles) for ai, bi in zip(a, b)]
+
+    def _choose_bands(self, num_perm: int, threshold: float) -> Tuple[int, int]:
+        """Pick LSH bands x rows whose S-curve midpoint sits just below threshold."""
+        best = (num_perm, 1)
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            if (1.0 / bands) ** (1.0 / rows) <= threshold * 0.9:
+                best = (bands, rows)
+        return best
+
+    def _load_duplicate_documents(self) -> Dict[str, Tuple[str, Any]]:
+        """Collect note and memory fingerprints for duplicate detection."""
+        documents = {}
+        reports = {self.vault_path / name for name in REPORT_FILES}
+        for note_path in self.vault_path.rglob('*.md'):
+            if note_path in reports:
+                continue
+            try:
+                identifier = str(note_path.relative_to(self.vault_path))[:-3]
+                documents['note:' + identifier] = (str(note_path.stat().st_mtime_ns), note_path)
+            except (OSError, ValueError):
+                continue
+
+        if self.brain_db_path and os.path.exists(self.brain_db_path):
+            conn = sqlite3.connect(self.brain_db_path)
+            try:
+                for key, value, updated_at in conn.execute(
+                        "SELECT key, value, updated_at FROM memories"):
+                    documents['memory:' + key] = (str(updated_at), value)
+            finally:
+                conn.close()
+        return documents
+
+    def find_duplicates(self, threshold: float = 0.8, num_perm: int = 128,
+                        save_report: bool = False) -> Dict[str, Any]:
+        """Find near-duplicate notes and memories with MinHash and LSH banding.
+
+        Signatures are cached in ``.brain-index/minhash.json`` keyed by note
+        mtime (or memory ``updated_at``), so only changed documents are
+        re-shingled. Candidate pairs come from LSH buckets and are confirmed
+        with the estimated Jaccard similarity.
+        """
+        cache_path = self.vault_path / '.brain-index' / 'minhash.json'
+        cache = {}
+        try:
+            cached = json.loads(cache_path.read_text(encoding='utf-8'))
+            if cached.get('num_perm') == num_perm:
+                cache = cached.get('signatures', {})
+        except (OSError, ValueError):
+            pass
+
+        a, b = self._minhash_params(num_perm)
+        signatures = {}
+        sizes = {}
+        recomputed = 0
+        for doc_id, (fingerprint, source) in self._load_duplicate_documents().items():
+            entry = cache.get(doc_id)
+            if entry and entry['fingerprint'] == fingerprint:
+                signatures[doc_id] = entry['signature']
+                sizes[doc_id] = entry['size']
+                continue
+            if isinstance(source, Path):
+                try:
+                    _, text = self._parse_frontmatter(source.read_text(encoding='utf-8'))
+                except (OSError, UnicodeDecodeError):
+                    continue
+            else:
+                text = source
+            shingles = self._shingles(text)
+            signatures[doc_id] = self._minhash(shingles, a, b)
+            sizes[doc_id] = len(text)
+            cache[doc_id] = {
+                'fingerprint': fingerprint,
+                'signature': signatures[doc_id],
+                'size': sizes[doc_id]
+            }
+            recomputed += 1
+
+        # Drop cache entries for deleted documents and persist
+        cache = {doc_id: cache[doc_id] for doc_id in signatures}
+        if recomputed or len(cache) != len(signatures):
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_text(json.dumps({'num_perm': num_perm, 'signatures': cache}),
+                                      encoding='utf-8')
+            except OSError:
+                pass
+
+        # LSH: documents sharing any band bucket become candidates
+        bands, rows = self._choose_bands(num_perm, threshold)
+        candidates = set()
+        empty = [MINHASH_PRIME] * num_perm
+        for band in range(bands):
+            buckets = defaultdict(list)
+            lo, hi = band * rows, (band + 1) * rows
+            for doc_id, signature in signatures.items():
+                if signature != empty:
+                    buckets[tuple(signature[lo:hi])].append(doc_id)
+            for members in buckets.values():
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        candidates.add((members[i], members[j]))
+
+        # Confirm candidates and union them into clusters
+        parent = {}
+
+        def find(doc_id):
+            while parent.get(doc_id, doc_id) != doc_id:
+                doc_id = parent[doc_id]
+            return doc_id
+
+        pair_scores = {}
+        for left, right in candidates:
+            matches = sum(1 for x, y in zip(signatures[left], signatures[right]) if x == y)
+            similarity = matches / num_perm
+            if similarity >= threshold:
+                pair_scores[(left, right)] = similarity
+                root_l, root_r = find(left), find(right)
+                if root_l != root_r:
+                    parent[root_l] = root_r
+
+        groups = defaultdict(set)
+        group_scores = defaultdict(list)
+        for (left, right), similarity in pair_scores.items():
+            root = find(left)
+            groups[root].update((left, right))
+            group_scores[root].append(similarity)
+
+        clusters = []
+        for root, members in groups.items():
+            members = sorted(members, key=lambda d: (-sizes[d], d))
+            clusters.append({
+                'keep': members[0],
+                'merge': members[1:],
+                'size': len(members),
+                'min_similarity': round(min(group_scores[root]), 3),
+                'max_similarity': round(max(group_scores[root]), 3)
+            })
+        clusters.sort(key=lambda c: (-c['size'], -c['max_similarity'], c['keep']))
+
+        result = {
+            'clusters': clusters,
+            'cluster_count': len(clusters),
+            'duplicate_count': sum(len(c['merge']) for c in clusters),
+            'documents_scanned': len(signatures),
+            'signatures_recomputed': recomputed,
+            'candidate_pairs': len(candidates),
+            'threshold': threshold,
+            'lsh': {'bands': bands, 'rows': rows}
+        }
+
+        if save_report:
+            report_path = self.vault_path / '_duplicates_report.md'
+            lines = []
+            for cluster in clusters:
+                lines.append(f"### Keep `{cluster['keep']}` "
+                             f"(similarity {cluster['min_similarity']:.2f}-{cluster['max_similarity']:.2f})")
+                lines.extend(f"- merge `{doc_id}`" for doc_id in cluster['merge'])
+                lines.append('')
+            report_content = f"""---
+generated_at: {datetime.datetime.now().isoformat()}
+type: duplicates_report
+---
+
+# Near-Duplicate Merge Report
+
+Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+## Overview
+- Documents Scanned: {result['documents_scanned']}
+- Duplicate Clusters: {result['cluster_count']}
+- Documents to Merge: {result['duplicate_count']}
+- Similarity Threshold: {threshold}
+
+## Clusters
+{chr(10).join(lines) if lines else 'No near-duplicates found.'}
+"""
+            report_path.write_text(report_content, encoding='utf-8')
+            result['report_saved'] = str(report_path)
+
+        return result
+
     def find_orphans(self) -> Dict[str, Any]:
         """Find notes with no incoming or outgoing links."""
         analysis = self.analyze_connections()
@@ -115,7 +354,7 @@ class BrainAnalyzer:
                     tag_counter[tags] += 1
             
             # Count words (simple approach)
-            words = re.findall(r'\\b\\w+\\b', body.lower())
+            words = self._words(body)
             total_words += len(words)
             # Only count meaningful words (length > 3)
             meaningful_words = [w for w in words if len(w) > 3]
@@ -129,16 +368,11 @@ class BrainAnalyzer:
             'top_words': word_counter.most_common(20)
         }
     
-    def generate_insights(self) -> Dict[str, Any]:
-        """Generate insights about the vault."""
+    def _build_insights(self, patterns: Dict[str, Any], orphan_percentage: float,
+                        total_links: int) -> List[Dict[str, str]]:
+        """Derive insights from already computed stats."""
         insights = []
         
-        # Get basic stats
-        patterns = self.analyze_patterns()
-        orphans = self.find_orphans()
-        connections = self.analyze_connections()
-        
-        # Generate insights
         if patterns['note_count'] == 0:
             insights.append({
                 'type': 'warning',
@@ -150,10 +384,10 @@ class BrainAnalyzer:
                 'message': f"Your vault contains {patterns['note_count']} notes with {patterns['total_words']} total words"
             })
         
-        if orphans['percentage'] > 50:
+        if orphan_percentage > 50:
             insights.append({
                 'type': 'suggestion',
-                'message': f"{orphans['percentage']:.1f}% of your notes are orphaned. Consider linking them to other notes."
+                'message': f"{orphan_percentage:.1f}% of your notes are orphaned. Consider linking them to other notes."
             })
         
         if patterns['top_tags']:
@@ -163,18 +397,119 @@ class BrainAnalyzer:
                 'message': f"Your most used tag is '{most_used_tag[0]}' with {most_used_tag[1]} occurrences"
             })
         
-        avg_connections = connections['total_links'] / patterns['note_count'] if patterns['note_count'] else 0
+        avg_connections = total_links / patterns['note_count'] if patterns['note_count'] else 0
         if avg_connections < 1:
             insights.append({
                 'type': 'suggestion',
                 'message': 'Your notes have few connections. Try linking related concepts together.'
             })
         
+        return insights
+    
+    def generate_insights(self) -> Dict[str, Any]:
+        """Generate insights about the vault."""
+        # Get basic stats
+        patterns = self.analyze_patterns()
+        orphans = self.find_orphans()
+        connections = self.analyze_connections()
+        
         return {
-            'insights': insights,
+            'insights': self._build_insights(patterns, orphans['percentage'], connections['total_links']),
             'generated_at': datetime.datetime.now().isoformat()
         }
     
+    def iter_analysis(self, sections: Optional[List[str]] = None, limit: Optional[int] = None,
+                      fields: Optional[List[str]] = None,
+                      linked_only: bool = False) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+        """Stream analysis items from a single pass over the vault.
+
+        ``sections`` picks any of connections, orphans, hubs, patterns and
+        insights. ``limit`` caps the items per list section and ``fields``
+        projects connection items (e.g. ``['note', 'link_count']`` keeps link
+        lists out of the stream). ``linked_only`` skips connection items for
+        notes without outgoing links before the limit is applied. Returns
+        totals for the stream trailer.
+        """
+        sections = set(sections or ['connections', 'orphans', 'hubs', 'patterns', 'insights'])
+        want_words = bool(sections & {'patterns', 'insights'})
+        connection_fields = None if fields is None else ['section'] + list(fields)
+        
+        tag_counter = Counter()
+        word_counter = Counter()
+        out_degree = {}
+        in_degree = Counter()
+        total_words = 0
+        total_links = 0
+        linked_notes = 0
+        connections_emitted = 0
+        
+        for note_path in self.vault_path.rglob('*.md'):
+            note_name = note_path.stem
+            content = note_path.read_text(encoding='utf-8')
+            metadata, body = self._parse_frontmatter(content)
+            
+            links = self._extract_links(body)
+            out_degree[note_name] = len(links)
+            in_degree.update(links)
+            total_links += len(links)
+            linked_notes += bool(links)
+            
+            if ('connections' in sections and (links or not linked_only)
+                    and (limit is None or connections_emitted < limit)):
+                connections_emitted += 1
+                yield project({
+                    'section': 'connections',
+                    'note': note_name,
+                    'links': links,
+                    'link_count': len(links)
+                }, connection_fields)
+            
+            if want_words:
+                tags = metadata.get('tags')
+                if isinstance(tags, list):
+                    tag_counter.update(tags)
+                elif isinstance(tags, str):
+                    tag_counter[tags] += 1
+                words = self._words(body)
+                total_words += len(words)
+                word_counter.update(w for w in words if len(w) > 3)
+        
+        note_count = len(out_degree)
+        orphans = [note for note, degree in out_degree.items() if not degree and not in_degree[note]]
+        orphan_percentage = (len(orphans) / note_count * 100) if note_count else 0
+        
+        if 'orphans' in sections:
+            for note in orphans[:limit]:
+                yield {'section': 'orphans', 'note': note}
+        
+        if 'hubs' in sections:
+            degree = Counter({note: out + in_degree[note] for note, out in out_degree.items()})
+            for note, connections in degree.most_common(min(limit or 5, 5)):
+                if connections:
+                    yield {'section': 'hubs', 'note': note, 'connections': connections}
+        
+        patterns = {
+            'note_count': note_count,
+            'total_words': total_words,
+            'average_words_per_note': total_words / note_count if note_count else 0,
+            'top_tags': tag_counter.most_common(10),
+            'top_words': word_counter.most_common(20)
+        }
+        if 'patterns' in sections:
+            yield {'section': 'patterns', **patterns}
+        
+        if 'insights' in sections:
+            for insight in self._build_insights(patterns, orphan_percentage, total_links)[:limit]:
+                yield {'section': 'insights', **insight}
+        
+        return {
+            'total_notes': note_count,
+            'total_links': total_links,
+            'linked_notes': linked_notes,
+            'orphan_count': len(orphans),
+            'orphan_percentage': orphan_percentage
+        }
+    
     def full_analysis(self, save_report: bool = False) -> Dict[str, Any]:
         """Perform full analysis of the vault."""
         analysis = {
@@ -0,0 +1,60 @@
+"""
+Streaming NDJSON Result Transport
+
+Results are written one JSON object per line: a header, one line per item
+and a trailer with totals. Item producers are generators that apply field
+projection and limits themselves and ``return`` their totals, so nothing
+the caller will drop is ever built or serialized.
+
+    {"type": "header", "kind": "notes", ...}
+    {"type": "item", "data": {...}}
+    {"type": "trailer", "emitted": 50, "total": 1234, ...}
+"""
+import json
+import sys
+from typing import Dict, List, Any, Generator, Iterable, Optional, TextIO, Tuple
+
+
+def project(record: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields (all of them if fields is None)."""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def collect(items: Generator[Dict[str, Any], None, Optional[Dict[str, Any]]]
+            ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Drain a generator into a list plus its returned totals."""
+    collected = []
+    while True:
+        try:
+            collected.append(next(items))
+        except StopIteration as stop:
+            return collected, stop.value or {}
+
+
+def write_ndjson(kind: str, items: Generator[Dict[str, Any], None, Optional[Dict[str, Any]]],
+                 header: Optional[Dict[str, Any]] = None, out: Optional[TextIO] = None,
+                 flush_every: int = 100) -> Dict[str, Any]:
+    """Stream a generator's items as NDJSON and finish with its returned totals."""
+    out = out or sys.stdout
+    out.write(json.dumps({'type': 'header', 'kind': kind, **(header or {})}) + '\n')
+
+    emitted = 0
+    totals = None
+    try:
+        while True:
+            item = next(items)
+            out.write(json.dumps({'type': 'item', 'data': item}) + '\n')
+            emitted += 1
+            if emitted % flush_every == 0:
+                out.flush()
+    except StopIteration as stop:
+        totals = stop.value
+    except Exception as e:
+        totals = {'error': str(e)}
+
+    trailer = {'type': 'trailer', 'emitted': emitted, **(totals or {})}
+    out.write(json.dumps(trailer) + '\n')
+    out.flush()
+    return trailer
@@ -5,7 +5,12 @@ import os
 import json
 import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Generator
+
+try:
+    from .ndjson_stream import collect, project
+except ImportError:
+    from ndjson_stream import collect, project
 
 # Import Mercury tracker
 try:
@@ -197,41 +202,56 @@ class ObsidianNote:
         except Exception as e:
             return {"error": str(e)}
     
-    def list_notes(self, folder: Optional[str] = None) -> Dict[str, Any]:
-        """List all notes in the vault or a specific folder."""
-        try:
-            search_path = self.vault_path
-            if folder and folder != '.':
-                search_path = self.vault_path / folder
-            
-            if not search_path.exists():
-                return {"error": f"Folder '{folder}' not found"}
+    def iter_notes(self, folder: Optional[str] = None, fields: Optional[List[str]] = None,
+                   limit: Optional[int] = None) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+        """Yield projected note entries and return the totals.
+
+        Files are only read when ``metadata`` is requested, and only for
+        the first ``limit`` notes; the rest are just counted.
+        """
+        search_path = self.vault_path
+        if folder and folder != '.':
+            search_path = self.vault_path / folder
+        
+        if not search_path.exists():
+            return {"error": f"Folder '{folder}' not found"}
+        
+        want_metadata = fields is None or 'metadata' in fields
+        total = 0
+        for note_path in search_path.rglob('*.md'):
+            # Skip files outside vault (e.g., symlinks)
+            try:
+                relative_path = note_path.relative_to(self.vault_path)
+            except ValueError:
+                continue
+            total += 1
+            if limit is not None and total > limit:
+                continue
             
-            notes = []
-            for note_path in search_path.rglob('*.md'):
-                # Skip files outside vault (e.g., symlinks)
-                try:
-                    relative_path = note_path.relative_to(self.vault_path)
-                except ValueError:
-                    continue
-                identifier = str(relative_path)[:-3]  # Remove .md extension
-                
-                # Try to get metadata
+            entry = {
+                "identifier": str(relative_path)[:-3],  # Remove .md extension
+                "path": str(relative_path)
+            }
+            if want_metadata:
                 try:
                     content = note_path.read_text(encoding='utf-8')
-                    metadata, _ = self._parse_frontmatter(content)
+                    entry["metadata"], _ = self._parse_frontmatter(content)
                 except:
-                    metadata = {}
-                
-                notes.append({
-                    "identifier": identifier,
-                    "path": str(relative_path),
-                    "metadata": metadata
-                })
-            
-            # Track in Mercury Evolution if we have results
-            if notes:
-                mercury_tracker.track_note_access('list', folder or 'vault')
+                    entry["metadata"] = {}
+            yield project(entry, fields)
+        
+        # Track in Mercury Evolution if we have results
+        if total:
+            mercury_tracker.track_note_access('list', folder or 'vault')
+        
+        return {"success": True, "total": total}
+    
+    def list_notes(self, folder: Optional[str] = None) -> Dict[str, Any]:
+        """List all notes in the vault or a specific folder."""
+        try:
+            notes, totals = collect(self.iter_notes(folder))
+            if "error" in totals:
+                return totals
             
             return {
                 "success": True,
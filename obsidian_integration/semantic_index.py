@@ -0,0 +1,717 @@
+"""
+Semantic Index for Brain and Obsidian
+
+Offline similarity search over Obsidian notes and brain memories using
+hashing-vectorized TF-IDF, optionally reduced with randomized SVD. No network
+access or model downloads are needed; the index is a NumPy matrix on disk.
+
+Indexing is a separate step from querying: run ``update`` (or this module's
+CLI) to refresh the index, or let ``update_in_background`` do it detached.
+The time of the last refresh is the mtime of a ``.refreshed`` stamp file, so
+a refresh that finds nothing changed does not rewrite the matrix archive.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import struct
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+TOKEN_PATTERN = re.compile(r'\w{2,}', re.UNICODE)
+INDEX_VERSION = 2
+LOCK_TIMEOUT = 3600
+NORM_EPSILON = 1e-6  # Smaller norms are float noise, e.g. terms the basis never saw
+NPZ_ALIGN = 64
+PADDING_EXTRA_ID = 0x7061  # Unregistered zip extra field; readers skip it
+
+
+def _csr_matmul(indptr: Any, indices: Any, weights: Any, dense: Any,
+                max_nnz: int = 1 << 16) -> Any:
+    """Multiply a CSR matrix by a dense matrix in bounded-memory row chunks."""
+    n_rows = len(indptr) - 1
+    out = np.zeros((n_rows, dense.shape[1]), dtype=np.float32)
+    start = 0
+    while start < n_rows:
+        stop = int(np.searchsorted(indptr, indptr[start] + max_nnz, side='right')) - 1
+        stop = min(max(stop, start + 1), n_rows)
+        lo, hi = indptr[start], indptr[stop]
+        if hi > lo:
+            products = weights[lo:hi, None] * dense[indices[lo:hi]]
+            starts = indptr[start:stop]
+            nonempty = np.diff(indptr[start:stop + 1]) > 0
+            out[start:stop][nonempty] = np.add.reduceat(products, starts[nonempty] - lo, axis=0)
+        start = stop
+    return out
+
+
+def _normalize_rows(matrix: Any, norms: Any) -> Any:
+    """Divide rows by their norms, zeroing rows whose norm is only noise."""
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms >= NORM_EPSILON)
+
+
+def _save_npz(path: Path, arrays: Dict[str, Any]) -> None:
+    """Write arrays like ``np.savez``, with every payload 64-byte aligned.
+
+    Each member's local header is padded through its extra field so that the
+    ``.npy`` data (itself padded to 64 bytes) starts on an aligned offset and
+    can be memory-mapped without hurting matrix products.
+    """
+    with open(path, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, array in arrays.items():
+            info = zipfile.ZipInfo(f"{name}.npy", date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_STORED
+            # Local header: 30 fixed bytes, the name, our padding record and
+            # the 20-byte zip64 record zipfile adds for force_zip64
+            used = f.tell() + 30 + len(info.filename.encode('utf-8')) + 4 + 20
+            padding = -used % NPZ_ALIGN
+            info.extra = struct.pack('<HH', PADDING_EXTRA_ID, padding) + bytes(padding)
+            with archive.open(info, 'w', force_zip64=True) as member:
+                np.lib.format.write_array(member, np.asanyarray(array), allow_pickle=False)
+
+
+def _map_npz(path: Path, min_bytes: int = 1 << 16) -> Dict[str, Any]:
+    """Open an ``.npz`` archive, memory-mapping its larger aligned arrays.
+
+    Stored members sit at a fixed offset and can be mapped instead of read
+    and CRC-checked, so loading a large index for a single query costs page
+    faults rather than a full read. Misaligned payloads are read into memory,
+    since matrix products on them are several times slower.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+            f.seek(info.header_offset)
+            name_len, extra_len = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            size = dtype.itemsize * math.prod(shape)
+            if dtype.hasobject or size < min_bytes or f.tell() % NPZ_ALIGN:
+                arrays[name] = np.fromfile(f, dtype=dtype, count=math.prod(shape)).reshape(
+                    shape, order='F' if fortran else 'C')
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                         shape=shape, order='F' if fortran else 'C')
+    return arrays
+
+
+class SemanticIndex:
+    """Incremental TF-IDF similarity index for notes and memories."""
+
+    NOTE_PREFIX = 'note:'
+    MEMORY_PREFIX = 'memory:'
+
+    def __init__(self, brain_db_path: Optional[str], vault_path: Optional[str],
+                 index_path: Optional[str] = None, n_features: int = 2 ** 15,
+                 n_components: Optional[int] = 256, refit_fraction: float = 0.1,
+                 svd_sample: int = 20000):
+        if np is None:
+            raise ImportError("SemanticIndex requires numpy (pip install 'claude-brain[semantic]')")
+
+        self.brain_db_path = brain_db_path
+        self.vault_path = Path(vault_path) if vault_path else None
+        if index_path is None and self.vault_path is not None:
+            index_path = self.vault_path / '.brain-index' / 'semantic.npz'
+        elif index_path is None and brain_db_path:
+            # A database-only index lives next to its brain.db
+            index_path = f"{brain_db_path}.semantic.npz"
+        self.index_path = Path(index_path) if index_path else None
+        self.n_features = n_features
+        self.n_components = n_components
+        self.refit_fraction = refit_fraction
+
+        self.svd_sample = svd_sample
+        self._reset()
+        self._load()
+
+    # ----- vectorisation -----
+
+    def _tokenize(self, text: str) -> List[str]:
+        """Split text into lowercase word tokens."""
+        return TOKEN_PATTERN.findall(text.lower())
+
+    def _hash_token(self, token: str) -> Tuple[int, float]:
+        """Map a token to a stable (feature, sign) pair."""
+        digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, 'little')
+        return value % self.n_features, (1.0 if value >> 63 else -1.0)
+
+    def _vectorize(self, text: str) -> Tuple[Any, Any]:
+        """Return the sparse sublinear term-frequency vector for text."""
+        counts: Dict[int, float] = {}
+        for token in self._tokenize(text):
+            feature, sign = self._hash_token(token)
+            counts[feature] = counts.get(feature, 0.0) + sign
+
+        features = sorted(f for f, c in counts.items() if c != 0)
+        values = [math.copysign(1.0 + math.log(abs(counts[f])), counts[f]) for f in features]
+        return np.asarray(features, dtype=np.int32), np.asarray(values, dtype=np.float32)
+
+    def _compute_idf(self) -> Any:
+        """Smoothed inverse document frequency per hashed feature."""
+        df = np.bincount(self.indices, minlength=self.n_features).astype(np.float32)
+        n_docs = len(self.doc_ids)
+        return (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    def _fit_components(self, n_iter: int = 4, oversample: int = 10) -> None:
+        """Fit a truncated basis with randomized SVD (Halko et al.) on a row sample."""
+        rng = np.random.default_rng(0)
+        n_docs = len(self.doc_ids)
+        rows = np.arange(n_docs)
+        if n_docs > self.svd_sample:
+            rows = np.sort(rng.choice(n_docs, self.svd_sample, replace=False))
+
+        # Gather the sampled tf-idf rows as CSR, plus a CSC view for X.T @ Y
+        lengths = np.diff(self.indptr)[rows]
+        indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        nnz = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        indices = self.indices[nnz]
+        weights = self.data[nnz] * self.idf[indices]
+        order = np.argsort(indices, kind='stable')
+        col_indptr = np.concatenate(([0], np.cumsum(np.bincount(indices, minlength=self.n_features))))
+        col_rows = np.repeat(np.arange(len(rows)), lengths)[order]
+        col_weights = weights[order]
+
+        def x_dot(dense):
+            return _csr_matmul(indptr, indices, weights, dense)
+
+        def xt_dot(dense):
+            return _csr_matmul(col_indptr, col_rows, col_weights, dense)
+
+        k = min(self.n_components, len(rows), self.n_features)
+        omega = rng.standard_normal((self.n_features, k + oversample)).astype(np.float32)
+        q, _ = np.linalg.qr(x_dot(omega))
+        for _ in range(n_iter):
+            q, _ = np.linalg.qr(xt_dot(q))
+            q, _ = np.linalg.qr(x_dot(q))
+        b = xt_dot(q).T  # (k + oversample, n_features)
+        _, _, vt = np.linalg.svd(b, full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:k], dtype=np.float32)
+
+    def _tfidf_rows(self, start: int) -> Tuple[Any, Any, Any]:
+        """Stored rows from ``start`` onwards as CSR tf-idf arrays."""
+        lo = self.indptr[start]
+        indptr = self.indptr[start:] - lo
+        indices = self.indices[lo:]
+        weights = self.data[lo:] * self.idf[indices]
+        return indptr, indices, weights
+
+    def _row_tfidf(self, row: int) -> Tuple[Any, Any]:
+        """A single stored row as sparse tf-idf."""
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        indices = self.indices[lo:hi]
+        return indices, self.data[lo:hi] * self.idf[indices]
+
+    def _project_rows(self, start: int) -> Any:
+        """Project stored rows from ``start`` onwards into index space, L2-normalised."""
+        indptr, indices, weights = self._tfidf_rows(start)
+        n_rows = len(indptr) - 1
+
+        if self.components is not None:
+            matrix = _csr_matmul(indptr, indices, weights,
+                                 np.ascontiguousarray(self.components.T))
+        else:
+            matrix = np.zeros((n_rows, self.n_features), dtype=np.float32)
+            rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+            matrix[rows, indices] = weights
+
+        return _normalize_rows(matrix, np.linalg.norm(matrix, axis=1, keepdims=True))
+
+    def _update_tail(self) -> None:
+        """Keep L2-normalised sparse tf-idf for rows added since the last fit.
+
+        The SVD basis cannot represent terms it was not fitted on, so these
+        rows are scored against queries in the unreduced space instead.
+        """
+        indptr, indices, weights = self._tfidf_rows(self.fitted_rows)
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(indptr) - 1))
+        self.tail = (indptr, indices, _normalize_rows(weights, norms[rows]).astype(np.float32))
+
+    def _fit(self) -> None:
+        """Freeze idf, fit the optional SVD basis and project every document."""
+        self.idf = self._compute_idf()
+        self.components = None
+        if self.n_components and len(self.doc_ids):
+            self._fit_components()
+        self.fitted_docs = len(self.doc_ids)
+        self.fitted_rows = self.fitted_docs
+        self.matrix = self._project_rows(0)
+        self._update_tail()
+
+    def _needs_refit(self) -> bool:
+        """Refit once the rows changed since the last fit pass ``refit_fraction``."""
+        if self.idf is None or self.fitted_docs == 0:
+            return True
+        # Rows re-added since the fit vs fitted rows since dropped
+        churn = max(len(self.doc_ids) - self.fitted_rows, self.fitted_docs - self.fitted_rows)
+        return churn >= self.refit_fraction * self.fitted_docs
+
+    def _sparse_to_dense(self, indices: Any, values: Any) -> Any:
+        """Expand a sparse tf-idf vector to a unit-length dense one."""
+        vec = np.zeros(self.n_features, dtype=np.float32)
+        vec[indices] = values
+        return _normalize_rows(vec, np.linalg.norm(vec))
+
+    def _project_sparse(self, indices: Any, values: Any) -> Any:
+        """Project a single sparse tf-idf vector into index space."""
+        if self.components is None:
+            return self._sparse_to_dense(indices, values)
+        vec = self.components[:, indices] @ values
+        return _normalize_rows(vec, np.linalg.norm(vec))
+
+    # ----- corpus collection -----
+
+    def _strip_frontmatter(self, content: str) -> str:
+        """Drop a leading YAML frontmatter block."""
+        if content.startswith('---\n'):
+            try:
+                return content[content.index('\n---\n', 4) + 5:]
+            except ValueError:
+                pass
+        return content
+
+    def _scan_notes(self) -> Dict[str, str]:
+        """Map note doc ids to their mtime fingerprint."""
+        found = {}
+        if self.vault_path is None or not self.vault_path.exists():
+            return found
+        for note_path in self.vault_path.rglob('*.md'):
+            try:
+                identifier = str(note_path.relative_to(self.vault_path))[:-3]
+                found[self.NOTE_PREFIX + identifier] = str(note_path.stat().st_mtime_ns)
+            except (OSError, ValueError):
+                continue
+        return found
+
+    def _scan_memories(self) -> Dict[str, str]:
+        """Map memory doc ids to their updated_at fingerprint."""
+        found = {}
+        if not self.brain_db_path or not os.path.exists(self.brain_db_path):
+            return found
+        try:
+            conn = sqlite3.connect(self.brain_db_path)
+            try:
+                for key, updated_at in conn.execute("SELECT key, updated_at FROM memories"):
+                    found[self.MEMORY_PREFIX + key] = str(updated_at)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+        return found
+
+    def _load_texts(self, doc_ids: List[str]) -> Dict[str, str]:
+        """Read the text of changed documents."""
+        texts = {}
+        memory_keys = []
+        for doc_id in doc_ids:
+            if doc_id.startswith(self.NOTE_PREFIX):
+                identifier = doc_id[len(self.NOTE_PREFIX):]
+                try:
+                    content = (self.vault_path / f"{identifier}.md").read_text(encoding='utf-8')
+                except (OSError, UnicodeDecodeError):
+                    continue
+                title = Path(identifier).name
+                texts[doc_id] = f"{title}\n{self._strip_frontmatter(content)}"
+            else:
+                memory_keys.append(doc_id[len(self.MEMORY_PREFIX):])
+
+        if memory_keys:
+            conn = sqlite3.connect(self.brain_db_path)
+            try:
+                for start in range(0, len(memory_keys), 500):
+                    batch = memory_keys[start:start + 500]
+                    placeholders = ','.join('?' * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, value, type FROM memories WHERE key IN ({placeholders})",
+                        batch
+                    )
+                    for key, value, mem_type in rows:
+                        texts[self.MEMORY_PREFIX + key] = f"{key}\n{mem_type}\n{value}"
+            finally:
+                conn.close()
+        return texts
+
+    # ----- persistence -----
+
+    def _reset(self) -> None:
+        """Start from an empty index."""
+        self.doc_ids = []
+        self.fingerprints = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.components = None
+        self.fitted_docs = 0
+        self.fitted_rows = 0
+        self.idf = None
+        self.matrix = np.zeros((0, self.n_components or self.n_features), dtype=np.float32)
+        self.tail = (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                     np.zeros(0, dtype=np.float32))
+        self.refreshed_at = 0.0
+        self._row_of = None
+        self._loaded_mtime = None
+
+    def _settings(self) -> Dict[str, Any]:
+        return {'version': INDEX_VERSION, 'n_features': self.n_features,
+                'n_components': self.n_components}
+
+    def _load(self) -> None:
+        """Map a previously saved index if it matches our settings."""
+        if self.index_path is None or not self.index_path.exists():
+            return
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+            saved = _map_npz(self.index_path)
+            if json.loads(str(saved['settings'])) != self._settings():
+                return
+            # doc_ids and fingerprints stay arrays until update() needs lists
+            self.doc_ids = saved['doc_ids']
+            self.fingerprints = saved['fingerprints']
+            self.indptr = saved['indptr']
+            self.indices = saved['indices']
+            self.data = saved['data']
+            self.idf = saved['idf']
+            self.fitted_docs = int(saved['fitted_docs'])
+            self.fitted_rows = int(saved['fitted_rows'])
+            self.components = saved.get('components')
+            self.matrix = saved['matrix']
+            self.tail = (saved['tail_indptr'], saved['tail_indices'], saved['tail_weights'])
+            self._row_of = None
+            self._loaded_mtime = mtime
+        except Exception:
+            # Corrupt or partially written index: rebuild on next update
+            self._reset()
+
+    def reload(self) -> bool:
+        """Pick up an index saved by another process; True if it changed."""
+        if self.index_path is None:
+            return False
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        self._load()
+        return True
+
+    def save(self) -> Optional[str]:
+        """Persist the index next to the vault (or brain.db without a vault)."""
+        if self.index_path is None:
+            return None
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            'settings': np.asarray(json.dumps(self._settings())),
+            'doc_ids': np.asarray(self.doc_ids, dtype=str),
+            'fingerprints': np.asarray(self.fingerprints, dtype=str),
+            'indptr': self.indptr,
+            'indices': self.indices,
+            'data': self.data,
+            'idf': self.idf if self.idf is not None else np.zeros(0, dtype=np.float32),
+            'fitted_docs': np.asarray(self.fitted_docs),
+            'fitted_rows': np.asarray(self.fitted_rows),
+            'matrix': self.matrix,
+            'tail_indptr': self.tail[0],
+            'tail_indices': self.tail[1],
+            'tail_weights': self.tail[2],
+        }
+        if self.components is not None:
+            arrays['components'] = self.components
+        tmp_path = self.index_path.with_name(self.index_path.stem + '.tmp.npz')
+        _save_npz(tmp_path, arrays)
+        os.replace(tmp_path, self.index_path)
+        self._loaded_mtime = self.index_path.stat().st_mtime_ns
+        return str(self.index_path)
+
+    def _lock_path(self) -> Path:
+        return self.index_path.with_name(self.index_path.name + '.lock')
+
+    def _stamp_path(self) -> Path:
+        return self.index_path.with_name(self.index_path.name + '.refreshed')
+
+    def _mark_refreshed(self) -> None:
+        """Record a refresh in memory and, when persisted, as the stamp file's mtime."""
+        self.refreshed_at = time.time()
+        if self.index_path is not None:
+            self._stamp_path().parent.mkdir(parents=True, exist_ok=True)
+            self._stamp_path().touch()
+
+    def _last_refresh(self) -> float:
+        """When this or any other process last refreshed the index."""
+        if self.index_path is None:
+            return self.refreshed_at
+        try:
+            return max(self.refreshed_at, self._stamp_path().stat().st_mtime)
+        except OSError:
+            return self.refreshed_at
+
+    def _acquire_lock(self) -> bool:
+        """Take the update lock, clearing one left behind by a crashed update."""
+        lock_path = self._lock_path()
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime < LOCK_TIMEOUT:
+                        return False
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def _release_lock(self) -> None:
+        try:
+            self._lock_path().unlink()
+        except FileNotFoundError:
+            pass
+
+    # ----- public API -----
+
+    def is_stale(self, max_age: float) -> bool:
+        """True if the index was never built or last refreshed over max_age seconds ago."""
+        return self.idf is None or time.time() - self._last_refresh() > max_age
+
+    def update_in_background(self) -> bool:
+        """Start a detached ``update`` unless one is already running."""
+        if self.index_path is None:
+            return False
+        try:
+            if time.time() - self._lock_path().stat().st_mtime < LOCK_TIMEOUT:
+                return False
+        except FileNotFoundError:
+            pass
+        # The child takes the lock itself, so racing callers start at most one update
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), 'update',
+             self.brain_db_path or '', str(self.vault_path or ''), str(self.index_path)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        return True
+
+    def update(self, rebuild: bool = False) -> Dict[str, Any]:
+        """Incrementally re-index notes and memories that changed.
+
+        Unchanged documents keep their vectors. Changed and new documents are
+        projected onto the existing basis and also kept as sparse tf-idf, so
+        terms the basis has never seen still match. idf and the SVD basis are
+        refit once the rows changed since the last fit pass ``refit_fraction``.
+        """
+        if rebuild:
+            self._reset()
+        self.doc_ids = [str(d) for d in self.doc_ids]
+        self.fingerprints = [str(f) for f in self.fingerprints]
+
+        current = self._scan_notes()
+        current.update(self._scan_memories())
+        stored = dict(zip(self.doc_ids, self.fingerprints))
+
+        changed = [d for d, fp in current.items() if stored.get(d) != fp]
+        removed = [d for d in stored if d not in current]
+        if not changed and not removed and self.idf is not None:
+            # Nothing to rewrite; only the refresh stamp moves
+            self._mark_refreshed()
+            return {'indexed': len(self.doc_ids), 'changed': 0, 'removed': 0, 'refit': False}
+
+        # Drop stale and changed rows
+        drop = set(changed) | set(removed)
+        keep_rows = np.fromiter((d not in drop for d in self.doc_ids), dtype=bool,
+                                count=len(self.doc_ids))
+        if not keep_rows.all():
+            lengths = np.diff(self.indptr)
+            keep_nnz = np.repeat(keep_rows, lengths)
+            self.indices = self.indices[keep_nnz]
+            self.data = self.data[keep_nnz]
+            self.indptr = np.concatenate(([0], np.cumsum(lengths[keep_rows]))).astype(np.int64)
+            self.doc_ids = [d for d, k in zip(self.doc_ids, keep_rows) if k]
+            self.fingerprints = [f for f, k in zip(self.fingerprints, keep_rows) if k]
+            self.matrix = self.matrix[keep_rows]
+            self.fitted_rows -= int((~keep_rows[:self.fitted_rows]).sum())
+        first_new = len(self.doc_ids)
+
+        # Append fresh rows for changed documents
+        texts = self._load_texts(changed)
+        new_indices, new_data, new_lengths = [], [], []
+        for doc_id in changed:
+            if doc_id not in texts:
+                continue
+            idx, vals = self._vectorize(texts[doc_id])
+            new_indices.append(idx)
+            new_data.append(vals)
+            new_lengths.append(len(idx))
+            self.doc_ids.append(doc_id)
+            self.fingerprints.append(current[doc_id])
+        if new_lengths:
+            self.indices = np.concatenate([self.indices] + new_indices).astype(np.int32)
+            self.data = np.concatenate([self.data] + new_data).astype(np.float32)
+            tail = self.indptr[-1] + np.cumsum(new_lengths)
+            self.indptr = np.concatenate((self.indptr, tail)).astype(np.int64)
+
+        refit = self._needs_refit()
+        if refit:
+            self._fit()
+        else:
+            if new_lengths:
+                self.matrix = np.concatenate((self.matrix, self._project_rows(first_new)))
+            self._update_tail()
+        self._row_of = None
+
+        self.save()
+        self._mark_refreshed()
+        return {
+            'indexed': len(self.doc_ids),
+            'changed': len(new_lengths),
+            'removed': len(removed),
+            'refit': refit
+        }
+
+    def _query_tfidf(self, text: str) -> Tuple[Any, Any]:
+        """Vectorise free text as sparse tf-idf."""
+        indices, values = self._vectorize(text)
+        return indices, values * self.idf[indices]
+
+    def _query_vector(self, text: str) -> Any:
+        """Vectorise free text into the index space."""
+        return self._project_sparse(*self._query_tfidf(text))
+
+    def _top_k(self, scores: Any, k: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Pick the k best rows from a score vector."""
+        if exclude is not None:
+            scores = scores.copy()
+            scores[exclude] = -np.inf
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if np.isfinite(scores[i]) and scores[i] > 1e-6]
+
+    def _format_hit(self, row: int, score: float) -> Dict[str, Any]:
+        """Shape a hit like the UnifiedSearch results."""
+        doc_id = str(self.doc_ids[row])
+        if doc_id.startswith(self.NOTE_PREFIX):
+            identifier = doc_id[len(self.NOTE_PREFIX):]
+            return {
+                'source': 'obsidian',
+                'type': 'note',
+                'title': Path(identifier).name,
+                'path': f"{identifier}.md",
+                'final_score': score
+            }
+        return {
+            'source': 'brain',
+            'key': doc_id[len(self.MEMORY_PREFIX):],
+            'final_score': score
+        }
+
+    def _source_mask(self, source: str) -> Optional[Any]:
+        """Boolean row mask restricting hits to one store."""
+        if source == 'all':
+            return None
+        prefix = self.NOTE_PREFIX if source == 'obsidian' else self.MEMORY_PREFIX
+        return np.char.startswith(np.asarray(self.doc_ids, dtype=str), prefix)
+
+    def search_many(self, queries: List[str], limit: int = 20,
+                    source: str = 'all') -> List[List[Dict[str, Any]]]:
+        """Answer several queries with one batched matrix product."""
+        if not queries or not len(self.doc_ids):
+            return [[] for _ in queries]
+        sparse = [self._query_tfidf(text) for text in queries]
+        q = np.stack([self._project_sparse(*vec) for vec in sparse], axis=1)
+        scores = self.matrix @ q  # (n_docs, n_queries)
+        if self.components is not None and self.fitted_rows < len(self.doc_ids):
+            # Rows added since the fit are scored unreduced so new terms still match
+            q_full = np.stack([self._sparse_to_dense(*vec) for vec in sparse], axis=1)
+            scores[self.fitted_rows:] = _csr_matmul(*self.tail, q_full)
+        mask = self._source_mask(source)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        return [[self._format_hit(row, score) for row, score in self._top_k(scores[:, j], limit)]
+                for j in range(scores.shape[1])]
+
+    def search(self, query: str, limit: int = 20, source: str = 'all') -> List[Dict[str, Any]]:
+        """Rank notes and memories by cosine similarity to the query."""
+        return self.search_many([query], limit, source)[0]
+
+    def resolve(self, identifier: str) -> Optional[int]:
+        """Find the row for a note identifier, note path or memory key."""
+        if self._row_of is None:
+            self._row_of = {str(doc_id): i for i, doc_id in enumerate(self.doc_ids)}
+        if identifier in self._row_of:
+            return self._row_of[identifier]
+        if identifier.endswith('.md'):
+            identifier = identifier[:-3]
+        for prefix in (self.NOTE_PREFIX, self.MEMORY_PREFIX):
+            row = self._row_of.get(prefix + identifier)
+            if row is not None:
+                return row
+        return None
+
+    def related(self, identifier: str, k: int = 10, source: str = 'all') -> Dict[str, Any]:
+        """Find the notes and memories most similar to a given one."""
+        row = self.resolve(identifier)
+        if row is None:
+            return {'error': f"'{identifier}' is not in the semantic index"}
+        scores = self.matrix @ self.matrix[row]
+        if self.components is not None and self.fitted_rows < len(self.doc_ids):
+            # Like search_many: rows added since the fit are compared unreduced
+            if row >= self.fitted_rows:
+                lo, hi = self.tail[0][row - self.fitted_rows:row - self.fitted_rows + 2]
+                vec = np.zeros(self.n_features, dtype=np.float32)
+                vec[self.tail[1][lo:hi]] = self.tail[2][lo:hi]
+            else:
+                vec = self._sparse_to_dense(*self._row_tfidf(row))
+            scores[self.fitted_rows:] = _csr_matmul(*self.tail, vec[:, None])[:, 0]
+        mask = self._source_mask(source)
+        if mask is not None:
+            scores[~mask] = -np.inf
+        hits = [self._format_hit(r, s) for r, s in self._top_k(scores, k, exclude=row)]
+        return {
+            'identifier': identifier,
+            'related': hits,
+            'count': len(hits)
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != 'update':
+        print("Usage: python semantic_index.py update <brain_db_path> <vault_path> [index_path] [--rebuild]")
+        print("       (pass '' for a missing brain_db_path or vault_path)")
+        sys.exit(1)
+
+    args = [arg for arg in sys.argv[2:] if arg != '--rebuild']
+    index = SemanticIndex(args[0] or None, args[1] or None,
+                          index_path=args[2] if len(args) > 2 else None)
+    if index.index_path is not None and not index._acquire_lock():
+        print(json.dumps({'skipped': 'another update is already running'}))
+        sys.exit(0)
+    try:
+        print(json.dumps(index.update(rebuild='--rebuild' in sys.argv)))
+    finally:
+        if index.index_path is not None:
+            index._release_lock()
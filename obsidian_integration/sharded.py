@@ -0,0 +1,360 @@
+"""
+Sharded Search and Analysis across many vaults and brain databases
+
+Fans queries out to every registered shard in parallel, merges top-k results
+with shard attribution and aggregates analysis stats. Each shard keeps its
+own UnifiedSearch and BrainAnalyzer instances, so caches never mix.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Generator
+
+try:
+    from .unified_search import UnifiedSearch
+    from .brain_analyzer import BrainAnalyzer
+    from .ndjson_stream import collect
+except ImportError:
+    from unified_search import UnifiedSearch
+    from brain_analyzer import BrainAnalyzer
+    from ndjson_stream import collect
+
+
+# BrainAnalyzer.iter_analysis sections each analysis type needs per shard
+ANALYSIS_SECTIONS = {
+    'full': ['orphans', 'hubs', 'patterns', 'insights'],
+    'connections': ['connections'],
+    'orphans': ['orphans'],
+    'patterns': ['patterns'],
+    'insights': ['insights'],
+}
+
+
+class Shard:
+    """One vault and/or brain database with its own search and analysis state."""
+
+    def __init__(self, name: str, vault_path: Optional[str] = None,
+                 brain_db_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.name = name
+        self.vault_path = vault_path
+        self.brain_db_path = brain_db_path
+        self.timeout = timeout
+        self._searcher = None
+        self._analyzer = None
+
+    @property
+    def searcher(self) -> UnifiedSearch:
+        if self._searcher is None:
+            self._searcher = UnifiedSearch(self.brain_db_path, self.vault_path)
+        return self._searcher
+
+    @property
+    def analyzer(self) -> BrainAnalyzer:
+        if self._analyzer is None:
+            self._analyzer = BrainAnalyzer(self.vault_path, brain_db_path=self.brain_db_path)
+        return self._analyzer
+
+    def sources(self, source: str) -> List[str]:
+        """Which of 'brain' and 'obsidian' this shard can answer for."""
+        available = []
+        if self.brain_db_path and source in ('all', 'brain'):
+            available.append('brain')
+        if self.vault_path and source in ('all', 'obsidian'):
+            available.append('obsidian')
+        return available
+
+
+class ShardedBrain:
+    def __init__(self, shards: Optional[List[Dict[str, Any]]] = None, default_timeout: float = 10.0):
+        self.default_timeout = default_timeout
+        self.shards: Dict[str, Shard] = {}
+        for shard in shards or []:
+            self.register(**shard)
+
+    @classmethod
+    def from_config(cls, config_path: str, default_timeout: float = 10.0) -> 'ShardedBrain':
+        """Load shards from a JSON list of {name, vault_path, brain_db_path, timeout}."""
+        shards = json.loads(Path(config_path).expanduser().read_text(encoding='utf-8'))
+        return cls(shards, default_timeout)
+
+    def register(self, name: str, vault_path: Optional[str] = None,
+                 brain_db_path: Optional[str] = None, timeout: Optional[float] = None) -> Shard:
+        """Register (or replace) a shard whose vault and database exist."""
+        if not vault_path and not brain_db_path:
+            raise ValueError(f"Shard '{name}' needs a vault_path or brain_db_path")
+        # sqlite3.connect would silently create an empty database at a typo
+        if vault_path:
+            vault_path = str(Path(vault_path).expanduser())
+            if not Path(vault_path).is_dir():
+                raise ValueError(f"Shard '{name}': vault_path {vault_path} is not a directory")
+        if brain_db_path:
+            brain_db_path = str(Path(brain_db_path).expanduser())
+            if not Path(brain_db_path).is_file():
+                raise ValueError(f"Shard '{name}': brain_db_path {brain_db_path} does not exist")
+        shard = Shard(name, vault_path, brain_db_path, timeout)
+        self.shards[name] = shard
+        return shard
+
+    def _fan_out(self, task: Callable[[Shard], Any]) -> Dict[str, Dict[str, Any]]:
+        """Run task on every shard in parallel, honouring per-shard timeouts.
+
+        Workers are daemon threads so a hung shard can neither delay the
+        merge past its timeout nor keep the process alive afterwards. A shard
+        that finishes after its own deadline counts as timed out, even if a
+        slower shard kept the merge waiting.
+        """
+        start = time.monotonic()
+        finished: Dict[str, Dict[str, Any]] = {}
+        threads = []
+
+        def run(shard: Shard) -> None:
+            try:
+                outcome = {'status': 'ok', 'result': task(shard)}
+            except Exception as e:
+                outcome = {'status': 'error', 'error': str(e)}
+            outcome['finished_at'] = time.monotonic()
+            finished[shard.name] = outcome
+
+        for shard in self.shards.values():
+            timeout = shard.timeout if shard.timeout is not None else self.default_timeout
+            thread = threading.Thread(target=run, args=(shard,), daemon=True)
+            thread.start()
+            threads.append((shard, thread, start + timeout))
+
+        for _, thread, deadline in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        outcomes = {}
+        for shard, _, deadline in threads:
+            outcome = finished.get(shard.name)
+            if outcome is None or outcome['finished_at'] > deadline:
+                outcomes[shard.name] = {'status': 'timeout',
+                                        'elapsed': round(deadline - start, 4)}
+                continue
+            outcome = {k: v for k, v in outcome.items() if k != 'finished_at'}
+            outcome['elapsed'] = round(finished[shard.name]['finished_at'] - start, 4)
+            outcomes[shard.name] = outcome
+        return outcomes
+
+    def _merge(self, per_shard: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+        """Merge shard result lists into one top-k list.
+
+        Scored results (semantic mode) are ranked by score; unscored keyword
+        results are interleaved round-robin so no shard crowds out the rest.
+        """
+        if all('final_score' in r for results in per_shard for r in results):
+            merged = [r for results in per_shard for r in results]
+            merged.sort(key=lambda r: r['final_score'], reverse=True)
+            return merged[:limit]
+
+        merged = []
+        depth = max((len(results) for results in per_shard), default=0)
+        for i in range(depth):
+            for results in per_shard:
+                if i < len(results):
+                    merged.append(results[i])
+                    if len(merged) >= limit:
+                        return merged
+        return merged
+
+    def search(self, query: str, limit: int = 20, source: str = 'all',
+               mode: str = 'keyword') -> Dict[str, Any]:
+        """Search every shard in parallel and merge their top-k results."""
+        def task(shard: Shard) -> Dict[str, Any]:
+            sources = shard.sources(source)
+            if not sources:
+                return {'merged': []}
+            shard_source = sources[0] if len(sources) == 1 else 'all'
+            return shard.searcher.search(query, limit, shard_source, mode)
+
+        outcomes = self._fan_out(task)
+        per_shard = []
+        for name, outcome in outcomes.items():
+            if outcome['status'] != 'ok':
+                continue
+            response = outcome.pop('result')
+            results = [dict(r, shard=name) for r in response['merged'] if 'error' not in r]
+            # A store that failed inside the shard makes the whole shard an error
+            errors = [r['error'] for r in response['merged'] if 'error' in r]
+            if errors:
+                outcome.update(status='error', error='; '.join(errors))
+            if response.get('notice'):
+                outcome['notice'] = response['notice']
+            outcome['result'] = results
+            per_shard.append(results)
+        merged = self._merge(per_shard, limit)
+
+        return {
+            'query': query,
+            'mode': mode,
+            'brain_count': sum(1 for r in merged if r.get('source') == 'brain'),
+            'obsidian_count': sum(1 for r in merged if r.get('source') == 'obsidian'),
+            'merged': merged,
+            'count': len(merged),
+            'shards': {
+                name: {k: v for k, v in o.items() if k != 'result'} | {'count': len(o.get('result', []))}
+                for name, o in outcomes.items()
+            }
+        }
+
+    def _analyze_shard(self, shard: Shard, analysis_type: str, limit: Optional[int],
+                       **duplicate_options: Any) -> Dict[str, Any]:
+        """Per-shard analysis from one pass over the vault, grouped by section."""
+        if not shard.vault_path:
+            return {}
+        if analysis_type == 'duplicates':
+            return {'duplicates': shard.analyzer.find_duplicates(**duplicate_options)}
+
+        sections = ANALYSIS_SECTIONS[analysis_type]
+        items, totals = collect(shard.analyzer.iter_analysis(sections, limit, linked_only=True))
+        result = {'totals': totals}
+        for item in items:
+            section = item.pop('section')
+            if section == 'patterns':
+                result['patterns'] = item
+            else:
+                result.setdefault(section, []).append(item)
+        for section in sections:
+            result.setdefault(section, [])
+        return result
+
+    def analyze(self, analysis_type: str = 'full', limit: Optional[int] = None,
+                **duplicate_options: Any) -> Dict[str, Any]:
+        """Run an analysis on every shard in parallel and aggregate the stats.
+
+        ``limit`` caps the listed connections, orphans and hubs per shard and
+        in the aggregate; counts always cover every note. Extra keyword
+        arguments (threshold, save_report) go to each shard's find_duplicates.
+        """
+        if analysis_type not in ANALYSIS_SECTIONS and analysis_type != 'duplicates':
+            return {'error': f"Unknown analysis type: {analysis_type}"}
+
+        outcomes = self._fan_out(
+            lambda shard: self._analyze_shard(shard, analysis_type, limit, **duplicate_options))
+        results = {name: o['result'] for name, o in outcomes.items() if o['status'] == 'ok'}
+        totals = {name: r['totals'] for name, r in results.items() if 'totals' in r}
+        aggregate = {}
+
+        patterns = {name: r['patterns'] for name, r in results.items() if 'patterns' in r}
+        if patterns:
+            # Per-shard top lists are summed, so counts are a lower bound
+            tags, words = Counter(), Counter()
+            for p in patterns.values():
+                tags.update(dict(p['top_tags']))
+                words.update(dict(p['top_words']))
+            note_count = sum(p['note_count'] for p in patterns.values())
+            total_words = sum(p['total_words'] for p in patterns.values())
+            aggregate['patterns'] = {
+                'note_count': note_count,
+                'total_words': total_words,
+                'average_words_per_note': total_words / note_count if note_count else 0,
+                'top_tags': tags.most_common(10),
+                'top_words': words.most_common(20)
+            }
+
+        if totals:
+            aggregate['connections'] = {
+                'total_notes': sum(t['total_notes'] for t in totals.values()),
+                'total_links': sum(t['total_links'] for t in totals.values()),
+                'linked_notes': sum(t['linked_notes'] for t in totals.values())
+            }
+            if analysis_type == 'connections':
+                notes = [dict(c, note=f"{name}:{c['note']}")
+                         for name, r in results.items() for c in r.get('connections', [])]
+                aggregate['connections']['notes'] = notes[:limit]
+
+        orphaned = {name: r['orphans'] for name, r in results.items() if 'orphans' in r}
+        if orphaned:
+            orphans = [f"{name}:{o['note']}" for name, items in orphaned.items() for o in items]
+            count = sum(totals[name]['orphan_count'] for name in orphaned)
+            all_notes = sum(totals[name]['total_notes'] for name in orphaned)
+            aggregate['orphans'] = {
+                'orphans': orphans[:limit],
+                'count': count,
+                'percentage': (count / all_notes * 100) if all_notes else 0
+            }
+
+        hubs = [dict(h, note=f"{name}:{h['note']}") for name, r in results.items() for h in r.get('hubs', [])]
+        if hubs:
+            hubs.sort(key=lambda h: -h['connections'])
+            aggregate['hubs'] = hubs[:min(limit or 5, 5)]
+
+        insights = [dict(i, shard=name) for name, r in results.items() for i in r.get('insights', [])]
+        if insights:
+            aggregate['insights'] = insights
+
+        duplicates = {name: r['duplicates'] for name, r in results.items() if 'duplicates' in r}
+        if duplicates:
+            clusters = [dict(c, shard=name) for name, d in duplicates.items() for c in d['clusters']]
+            clusters.sort(key=lambda c: (-c['size'], -c['max_similarity']))
+            aggregate['duplicates'] = {
+                'clusters': clusters,
+                'cluster_count': len(clusters),
+                'duplicate_count': sum(d['duplicate_count'] for d in duplicates.values()),
+                'documents_scanned': sum(d['documents_scanned'] for d in duplicates.values())
+            }
+
+        return {
+            'analysis_type': analysis_type,
+            'aggregate': aggregate,
+            'shards': {
+                name: {k: v for k, v in o.items() if k != 'result'}
+                for name, o in outcomes.items()
+            }
+        }
+
+    def iter_analysis(self, analysis_type: str = 'full', limit: Optional[int] = None
+                      ) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+        """Stream an aggregate analysis as BrainAnalyzer.iter_analysis items.
+
+        Notes are prefixed with their shard name; the returned trailer totals
+        also carry the per-shard statuses.
+        """
+        analysis = self.analyze(analysis_type, limit)
+        if 'error' in analysis:
+            return {'error': analysis['error']}
+        aggregate = analysis['aggregate']
+
+        connections = aggregate.get('connections', {})
+        for item in connections.get('notes', []):
+            yield {'section': 'connections', **item}
+        orphans = aggregate.get('orphans', {})
+        for note in orphans.get('orphans', []):
+            yield {'section': 'orphans', 'note': note}
+        for hub in aggregate.get('hubs', []):
+            yield {'section': 'hubs', **hub}
+        if 'patterns' in aggregate:
+            yield {'section': 'patterns', **aggregate['patterns']}
+        for insight in aggregate.get('insights', []):
+            yield {'section': 'insights', **insight}
+
+        return {
+            'total_notes': connections.get('total_notes', 0),
+            'total_links': connections.get('total_links', 0),
+            'linked_notes': connections.get('linked_notes', 0),
+            'orphan_count': orphans.get('count', 0),
+            'orphan_percentage': orphans.get('percentage', 0),
+            'shards': analysis['shards']
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 4:
+        print("Usage: python sharded.py <shards.json> search <query> [limit] [source] [mode]")
+        print("       python sharded.py <shards.json> analyze <analysis_type>")
+        sys.exit(1)
+
+    brain = ShardedBrain.from_config(sys.argv[1])
+    if sys.argv[2] == 'search':
+        limit = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+        source = sys.argv[5] if len(sys.argv) > 5 else 'all'
+        mode = sys.argv[6] if len(sys.argv) > 6 else 'keyword'
+        results = brain.search(sys.argv[3], limit, source, mode)
+    else:
+        results = brain.analyze(sys.argv[3])
+
+    print(json.dumps(results, indent=2))
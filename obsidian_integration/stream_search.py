@@ -0,0 +1,186 @@
+"""
+Index-free Streaming Search for Obsidian
+
+Literal ASCII queries are matched with ``bytes.lower().find`` over fixed-size
+chunks of each note, so ad-hoc searches never decode whole notes and use
+constant memory per file. Regex and non-ASCII queries fall back to a compiled
+bytes pattern. Only the preview window of a matching note is decoded.
+"""
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
+
+FRONTMATTER_START = b'---\n'
+FRONTMATTER_END = b'\n---\n'
+CHUNK_SIZE = 1 << 14
+
+
+def compile_pattern(query: str, regex: bool = False) -> 're.Pattern[bytes]':
+    """Compile a case-insensitive UTF-8 bytes pattern for a query.
+
+    ``re.IGNORECASE`` only folds ASCII for bytes patterns, so non-ASCII
+    letters are expanded into alternations of their cased encodings.
+    """
+    if regex:
+        return re.compile(query.encode('utf-8'), re.IGNORECASE)
+
+    parts = []
+    for char in query:
+        variants = {char, char.lower(), char.upper()}
+        encoded = sorted({re.escape(v.encode('utf-8')) for v in variants if len(v) == 1})
+        if char.isascii() or len(encoded) == 1:
+            parts.append(re.escape(char.encode('utf-8')))
+        else:
+            parts.append(b'(?:' + b'|'.join(encoded) + b')')
+    return re.compile(b''.join(parts), re.IGNORECASE)
+
+
+class StreamingSearch:
+    """Search notes without an index using chunked literal or pattern matching."""
+
+    def __init__(self, vault_path: str, max_workers: Optional[int] = None,
+                 batch_size: int = 16, preview_chars: int = 200,
+                 chunk_size: int = CHUNK_SIZE):
+        self.vault_path = Path(vault_path)
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.preview_chars = preview_chars
+        self.chunk_size = chunk_size
+
+    def _preview(self, buffer: Any) -> str:
+        """Decode only the start of the body, skipping frontmatter."""
+        start = 0
+        if buffer[:len(FRONTMATTER_START)] == FRONTMATTER_START:
+            end = buffer.find(FRONTMATTER_END, len(FRONTMATTER_START) - 1)
+            if end != -1:
+                start = end + len(FRONTMATTER_END)
+
+        # UTF-8 needs at most 4 bytes per char; leading whitespace is stripped
+        window = bytes(buffer[start:start + self.preview_chars * 4 + 256])
+        text = window.decode('utf-8', errors='ignore').strip()
+        if len(text) > self.preview_chars:
+            return text[:self.preview_chars] + '...'
+        return text
+
+    def _contains(self, buffer: Any, size: int, needle: bytes) -> bool:
+        """Case-insensitive literal search in chunks overlapping by len(needle) - 1."""
+        step = max(self.chunk_size, len(needle))
+        overlap = len(needle) - 1
+        for start in range(0, size, step):
+            if buffer[start:start + step + overlap].lower().find(needle) != -1:
+                return True
+        return False
+
+    def _match_file(self, note_path: str, needle: Optional[bytes],
+                    pattern: Optional['re.Pattern[bytes]'],
+                    title_pattern: 're.Pattern[str]') -> Optional[Dict[str, Any]]:
+        """Return a result for a note if its title or content matches."""
+        title = os.path.basename(note_path)[:-3]
+        title_match = title_pattern.search(title) is not None
+        try:
+            with open(note_path, 'rb', buffering=0) as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    if not title_match:
+                        return None
+                    preview = ''
+                elif size <= self.chunk_size:
+                    # A single read is cheaper than setting up a mapping
+                    buffer = f.read()
+                    if not title_match and not self._buffer_matches(buffer, len(buffer), needle, pattern):
+                        return None
+                    preview = self._preview(buffer)
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        if not title_match and not self._buffer_matches(buffer, size, needle, pattern):
+                            return None
+                        preview = self._preview(buffer)
+        except (OSError, ValueError):
+            return None
+
+        return {
+            'source': 'obsidian',
+            'type': 'note',
+            'title': title,
+            'path': os.path.relpath(note_path, self.vault_path),
+            'preview': preview
+        }
+
+    def _buffer_matches(self, buffer: Any, size: int, needle: Optional[bytes],
+                        pattern: Optional['re.Pattern[bytes]']) -> bool:
+        """Match the literal needle if there is one, else the compiled pattern."""
+        if needle is not None:
+            return self._contains(buffer, size, needle)
+        return pattern.search(buffer) is not None
+
+    def _match_batch(self, batch: List[str], needle: Optional[bytes],
+                     pattern: Optional['re.Pattern[bytes]'],
+                     title_pattern: 're.Pattern[str]') -> List[Dict[str, Any]]:
+        results = []
+        for note_path in batch:
+            result = self._match_file(note_path, needle, pattern, title_pattern)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def _batches(self) -> Iterator[List[str]]:
+        """Note paths in the same order as ``rglob('*.md')``, without pathlib overhead.
+
+        Like ``rglob``, directory symlinks are not followed, so a link back to
+        a parent cannot repeat notes or leave the vault.
+        """
+        batch = []
+        for dirpath, _, filenames in os.walk(self.vault_path):
+            for filename in filenames:
+                if not filename.endswith('.md'):
+                    continue
+                batch.append(os.path.join(dirpath, filename))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def search(self, query: str, limit: int = 20, regex: bool = False) -> List[Dict[str, Any]]:
+        """Find notes whose title or content match, in vault walk order."""
+        needle, pattern = None, None
+        if regex:
+            pattern = compile_pattern(query, regex)
+            title_pattern = re.compile(query, re.IGNORECASE)
+        else:
+            if query.isascii():
+                needle = query.lower().encode('ascii')
+            else:
+                pattern = compile_pattern(query)
+            title_pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+        args = (needle, pattern, title_pattern)
+        if self.max_workers <= 1:
+            results = []
+            for batch in self._batches():
+                results.extend(self._match_batch(batch, *args))
+                if len(results) >= limit:
+                    break
+            return results[:limit]
+
+        results = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # One batch in flight per worker, consumed in walk order
+            pending = []
+            for batch in self._batches():
+                pending.append(executor.submit(self._match_batch, batch, *args))
+                if len(pending) < self.max_workers:
+                    continue
+                results.extend(pending.pop(0).result())
+                if len(results) >= limit:
+                    break
+            while pending and len(results) < limit:
+                results.extend(pending.pop(0).result())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results[:limit]
@@ -6,14 +6,97 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 import sqlite3
 
+try:
+    from .stream_search import StreamingSearch
+except ImportError:
+    # Running as a script from inside the package directory
+    from stream_search import StreamingSearch
+
 
 class UnifiedSearch:
-    def __init__(self, brain_db_path: str, vault_path: str):
+    def __init__(self, brain_db_path: Optional[str], vault_path: Optional[str],
+                 semantic_max_age: float = 300.0):
         self.brain_db_path = brain_db_path
-        self.vault_path = Path(vault_path)
+        self.vault_path = Path(vault_path) if vault_path else None
+        self.semantic_max_age = semantic_max_age
+        self._semantic_index = None
+
+    def _get_semantic_index(self):
+        """Load the semantic index, refreshing it in the background when stale.
+
+        Queries never re-scan the vault themselves; returns None while the
+        first build is still running.
+        """
+        if self._semantic_index is None:
+            try:
+                from .semantic_index import SemanticIndex
+            except ImportError:
+                from semantic_index import SemanticIndex
+            vault_path = str(self.vault_path) if self.vault_path else None
+            self._semantic_index = SemanticIndex(self.brain_db_path, vault_path)
+        else:
+            self._semantic_index.reload()
+
+        index = self._semantic_index
+        if index.is_stale(self.semantic_max_age):
+            index.update_in_background()
+        return index if index.idf is not None else None
+
+    def _enrich_brain_hits(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill in type, preview and timestamps for memory hits."""
+        keys = [hit['key'] for hit in hits if hit.get('source') == 'brain']
+        if not keys:
+            return hits
+
+        conn = sqlite3.connect(self.brain_db_path)
+        conn.row_factory = sqlite3.Row
+        placeholders = ','.join('?' * len(keys))
+        rows = {
+            row['key']: row for row in conn.execute(
+                f"SELECT key, value, type, created_at FROM memories WHERE key IN ({placeholders})",
+                keys
+            )
+        }
+        conn.close()
+
+        for hit in hits:
+            row = rows.get(hit.get('key'))
+            if hit.get('source') != 'brain' or row is None:
+                continue
+            value = row['value']
+            if len(value) > 150:
+                value = value[:150] + '...'
+            hit.update({'type': row['type'], 'value': value, 'created_at': row['created_at']})
+        return hits
+
+    def search_semantic(self, query: str, limit: int = 20, source: str = 'all') -> List[Dict[str, Any]]:
+        """Rank notes and memories by TF-IDF cosine similarity."""
+        try:
+            index = self._get_semantic_index()
+            if index is None:
+                return [{'source': 'semantic',
+                         'error': 'Semantic index is being built in the background; try again shortly'}]
+            return self._enrich_brain_hits(index.search(query, limit, source))
+        except Exception as e:
+            return [{'source': 'semantic', 'error': str(e)}]
+
+    def related(self, identifier: str, k: int = 10, source: str = 'all') -> Dict[str, Any]:
+        """Find notes and memories similar to a note identifier or memory key."""
+        try:
+            index = self._get_semantic_index()
+            if index is None:
+                return {'error': 'Semantic index is being built in the background; try again shortly'}
+            result = index.related(identifier, k, source)
+            if 'related' in result:
+                self._enrich_brain_hits(result['related'])
+            return result
+        except Exception as e:
+            return {'error': str(e)}
     
     def search_brain(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Search brain memories."""
+        if not self.brain_db_path:
+            return []
         try:
             conn = sqlite3.connect(self.brain_db_path)
             conn.row_factory = sqlite3.Row
@@ -64,47 +147,32 @@ class UnifiedSearch:
     
     def search_obsidian(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Search Obsidian notes."""
+        if self.vault_path is None:
+            return []
         try:
-            results = []
-            query_lower = query.lower()
-            
-            for note_path in self.vault_path.rglob('*.md'):
-                if len(results) >= limit:
-                    break
-                
-                try:
-                    content = note_path.read_text(encoding='utf-8')
-                    title = note_path.stem
-                    
-                    # Check if query matches title or content
-                    if query_lower in title.lower() or query_lower in content.lower():
-                        # Extract first 200 chars of content (skip frontmatter)
-                        preview = content
-                        if preview.startswith('---\\n'):
-                            try:
-                                end_idx = preview.index('\\n---\\n', 4) + 5
-                                preview = preview[end_idx:]
-                            except:
-                                pass
-                        
-                        preview = preview.strip()[:200] + '...' if len(preview) > 200 else preview.strip()
-                        
-                        results.append({
-                            'source': 'obsidian',
-                            'type': 'note',
-                            'title': title,
-                            'path': str(note_path.relative_to(self.vault_path)),
-                            'preview': preview
-                        })
-                except Exception:
-                    continue
-            
-            return results
+            # Stream over memory-mapped files; no index or full decode needed
+            return StreamingSearch(str(self.vault_path)).search(query, limit)
         except Exception as e:
             return [{'source': 'obsidian', 'error': str(e)}]
     
-    def search(self, query: str, limit: int = 20, source: str = 'all') -> Dict[str, Any]:
+    def search(self, query: str, limit: int = 20, source: str = 'all', mode: str = 'keyword') -> Dict[str, Any]:
         """Unified search across brain and obsidian."""
+        notice = None
+        if mode == 'semantic':
+            merged = self.search_semantic(query, limit, source)
+            errors = [r['error'] for r in merged if 'error' in r]
+            if not errors:
+                return {
+                    'query': query,
+                    'mode': mode,
+                    'brain_count': sum(1 for r in merged if r.get('source') == 'brain'),
+                    'obsidian_count': sum(1 for r in merged if r.get('source') == 'obsidian'),
+                    'merged': merged,
+                    'count': len(merged)
+                }
+            # Index still building or numpy missing: answer with keyword search
+            notice = f"Semantic search unavailable ({errors[0]}); showing keyword results"
+
         brain_results = []
         obsidian_results = []
 
@@ -118,13 +186,16 @@ class UnifiedSearch:
         all_results = brain_results + obsidian_results
         merged = all_results[:limit]
 
-        return {
+        results = {
             'query': query,
             'brain_count': len(brain_results),
             'obsidian_count': len(obsidian_results),
             'merged': merged,
             'count': len(merged)
         }
+        if notice:
+            results['notice'] = notice
+        return results
 
 
 if __name__ == "__main__":
@@ -132,18 +203,19 @@ if __name__ == "__main__":
     import os
 
     if len(sys.argv) < 4:
-        print("Usage: python unified_search.py <query> <limit> <source>")
+        print("Usage: python unified_search.py <query> <limit> <source> [keyword|semantic]")
         sys.exit(1)
 
     query = sys.argv[1]
     limit = int(sys.argv[2])
     source = sys.argv[3]
+    mode = sys.argv[4] if len(sys.argv) > 4 else 'keyword'
 
     # Get paths from config
     brain_db_path = os.path.expanduser("~/.claude-brain/brain/brain/brain.db")
     vault_path = os.path.expanduser("~/.claude-brain/brain/BrainVault")
 
     searcher = UnifiedSearch(brain_db_path, vault_path)
-    results = searcher.search(query, limit, source)
+    results = searcher.search(query, limit, source, mode)
 
     print(json.dumps(results, indent=2))
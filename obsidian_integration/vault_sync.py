@@ -0,0 +1,351 @@
+"""
+Incremental Sync between Brain memories and the Obsidian vault
+
+Mirrors selected memory types into vault notes and selected vault folders
+into memories. Changes are found through ``updated_at`` watermarks and note
+mtimes recorded in a state file, so a resync only touches what changed.
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+try:
+    from .obsidian_note import ObsidianNote
+except ImportError:
+    from obsidian_note import ObsidianNote
+
+
+NOTE_KEY_PREFIX = 'obsidian:'
+
+
+def _now() -> str:
+    """Timestamp in the same ISO format index.js writes to memories."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class VaultSync:
+    def __init__(self, brain_db_path: str, vault_path: str,
+                 memory_types: Optional[List[str]] = None,
+                 note_folders: Optional[List[str]] = None,
+                 export_folder: str = 'Brain-Memories',
+                 note_memory_type: str = 'obsidian',
+                 batch_size: int = 500):
+        self.brain_db_path = brain_db_path
+        self.vault_path = Path(vault_path)
+        self.memory_types = memory_types or []
+        self.note_folders = note_folders or []
+        self.export_folder = export_folder
+        self.note_memory_type = note_memory_type
+        self.batch_size = batch_size
+        self.state_path = self.vault_path / '.brain-index' / 'sync_state.json'
+        self._notes = ObsidianNote(vault_path)
+
+    # ----- state -----
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Load watermarks and per-item sync records."""
+        try:
+            state = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault('memory_watermarks', {})
+        state.setdefault('exported', {})
+        state.setdefault('imported', {})
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        tmp_path.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        os.replace(tmp_path, self.state_path)
+
+    # ----- memories -> notes -----
+
+    def _export_path(self, key: str, memory_type: str, state: Dict[str, Any]) -> Path:
+        """Vault path a memory is mirrored to.
+
+        Sanitizing can map different keys to the same name (``project:foo``
+        and ``project-foo``), so a short hash of the exact key is appended.
+        Memories that were already mirrored keep their recorded path.
+        """
+        record = state['exported'].get(key)
+        if record and record.get('path'):
+            return self.vault_path / record['path']
+        safe_key = re.sub(r'[^\w\-. ]', '-', key).strip('. ') or 'memory'
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+        return self.vault_path / self.export_folder / memory_type / f"{safe_key}-{digest}.md"
+
+    def _plan_export(self, conn: sqlite3.Connection, state: Dict[str, Any],
+                     prefer: Optional[str] = None) -> Dict[str, List]:
+        """Find memories changed since the watermark and check for conflicts.
+
+        A mirrored note edited in the vault is a conflict unless ``prefer``
+        settles it: 'brain' overwrites the note, 'vault' copies the note back
+        into the memory.
+        """
+        plan = {'write': [], 'adopt': [], 'conflicts': [], 'unchanged': 0}
+        if not self.memory_types:
+            return plan
+
+        # Types added since the last sync start from an empty watermark
+        watermark = min(state['memory_watermarks'].get(t, '') for t in self.memory_types)
+        placeholders = ','.join('?' * len(self.memory_types))
+        rows = conn.execute(
+            f"""SELECT key, value, type, created_at, updated_at
+                FROM memories
+                WHERE type IN ({placeholders})
+                  AND updated_at >= ?
+                  AND key NOT LIKE ?
+                ORDER BY updated_at""",
+            (*self.memory_types, watermark, NOTE_KEY_PREFIX + '%')
+        )
+
+        for key, value, memory_type, created_at, updated_at in rows:
+            record = state['exported'].get(key)
+            if record and record['updated_at'] == updated_at:
+                plan['unchanged'] += 1
+                continue
+
+            note_path = self._export_path(key, memory_type, state)
+            if note_path.exists():
+                mtime_ns = note_path.stat().st_mtime_ns
+                edited_in_vault = record is None or record.get('mtime_ns') != mtime_ns
+                if edited_in_vault and prefer == 'vault':
+                    plan['adopt'].append({'key': key, 'type': memory_type, 'path': note_path})
+                    continue
+                if edited_in_vault and prefer != 'brain':
+                    plan['conflicts'].append({
+                        'direction': 'brain_to_vault',
+                        'key': key,
+                        'type': memory_type,
+                        'updated_at': updated_at,
+                        'path': str(note_path.relative_to(self.vault_path)),
+                        'reason': 'note was edited in the vault since the last sync'
+                    })
+                    continue
+
+            plan['write'].append({
+                'key': key,
+                'type': memory_type,
+                'value': value,
+                'created_at': created_at,
+                'updated_at': updated_at,
+                'path': note_path
+            })
+        return plan
+
+    def _apply_export(self, conn: sqlite3.Connection, plan: Dict[str, List],
+                      state: Dict[str, Any]) -> None:
+        """Write mirrored notes in bulk and record their mtimes."""
+        synced_at = _now()
+        for item in plan['write']:
+            metadata = {
+                'brain_key': item['key'],
+                'brain_type': item['type'],
+                'brain_updated_at': item['updated_at'],
+                'created': item['created_at'],
+                'synced_at': synced_at
+            }
+            note_path = item['path']
+            note_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = note_path.with_name(note_path.name + '.tmp')
+            tmp_path.write_text(self._notes._create_frontmatter(metadata) + item['value'],
+                                encoding='utf-8')
+            os.replace(tmp_path, note_path)
+            state['exported'][item['key']] = {
+                'updated_at': item['updated_at'],
+                'path': str(note_path.relative_to(self.vault_path)),
+                'mtime_ns': note_path.stat().st_mtime_ns
+            }
+
+        # Vault edits that won a conflict become the memory's new value
+        adopted = []
+        for item in plan['adopt']:
+            try:
+                content = item['path'].read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            _, body = self._notes._parse_frontmatter(content)
+            adopted.append((body.strip(), synced_at, item['key']))
+            state['exported'][item['key']] = {
+                'updated_at': synced_at,
+                'path': str(item['path'].relative_to(self.vault_path)),
+                'mtime_ns': item['path'].stat().st_mtime_ns
+            }
+        if adopted:
+            with conn:
+                for start in range(0, len(adopted), self.batch_size):
+                    conn.executemany("UPDATE memories SET value = ?, updated_at = ? WHERE key = ?",
+                                     adopted[start:start + self.batch_size])
+
+        # Advance each type's watermark, but never past an unresolved conflict
+        for memory_type in self.memory_types:
+            written = [i['updated_at'] or '' for i in plan['write'] if i['type'] == memory_type]
+            held = [c['updated_at'] or '' for c in plan['conflicts'] if c['type'] == memory_type]
+            watermark = max([state['memory_watermarks'].get(memory_type, '')] + written)
+            if held:
+                watermark = min([watermark] + held)
+            state['memory_watermarks'][memory_type] = watermark
+
+    # ----- notes -> memories -----
+
+    def _plan_import(self, conn: sqlite3.Connection, state: Dict[str, Any],
+                     prefer: Optional[str] = None) -> Dict[str, List]:
+        """Find notes whose mtime changed and check for conflicts.
+
+        A memory changed in brain since its note was imported is a conflict
+        unless ``prefer`` settles it: 'vault' re-imports the note, 'brain'
+        keeps the memory and marks the note as synced.
+        """
+        plan = {'write': [], 'keep': [], 'conflicts': [], 'unchanged': 0}
+        export_root = self.vault_path / self.export_folder
+
+        changed = []
+        for folder in self.note_folders:
+            folder_path = self.vault_path / folder
+            if not folder_path.exists():
+                continue
+            for note_path in folder_path.rglob('*.md'):
+                if export_root in note_path.parents:
+                    continue
+                identifier = str(note_path.relative_to(self.vault_path))[:-3]
+                mtime_ns = note_path.stat().st_mtime_ns
+                record = state['imported'].get(identifier)
+                if record and record['mtime_ns'] == mtime_ns:
+                    plan['unchanged'] += 1
+                    continue
+                changed.append((identifier, note_path, mtime_ns))
+
+        # Look up the current memory rows for all changed notes in batches
+        existing = {}
+        keys = [NOTE_KEY_PREFIX + identifier for identifier, _, _ in changed]
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            placeholders = ','.join('?' * len(batch))
+            for key, updated_at in conn.execute(
+                    f"SELECT key, updated_at FROM memories WHERE key IN ({placeholders})", batch):
+                existing[key] = updated_at
+
+        for identifier, note_path, mtime_ns in changed:
+            key = NOTE_KEY_PREFIX + identifier
+            record = state['imported'].get(identifier)
+            if key in existing and (record is None or record.get('updated_at') != existing[key]) \
+                    and prefer != 'vault':
+                if prefer == 'brain':
+                    plan['keep'].append({'identifier': identifier, 'mtime_ns': mtime_ns,
+                                         'updated_at': existing[key]})
+                    continue
+                plan['conflicts'].append({
+                    'direction': 'vault_to_brain',
+                    'key': key,
+                    'path': str(note_path.relative_to(self.vault_path)),
+                    'reason': 'memory was changed in brain since the last sync'
+                })
+                continue
+
+            try:
+                content = note_path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            metadata, body = self._notes._parse_frontmatter(content)
+            if 'brain_key' in metadata:
+                # A note mirrored from brain; never import it back
+                continue
+            plan['write'].append({
+                'identifier': identifier,
+                'key': key,
+                'value': body.strip(),
+                'metadata': json.dumps({'source': 'obsidian', 'path': f"{identifier}.md"}),
+                'mtime_ns': mtime_ns
+            })
+        return plan
+
+    def _apply_import(self, conn: sqlite3.Connection, plan: Dict[str, List],
+                      state: Dict[str, Any]) -> None:
+        """Upsert changed notes into memories with batched executemany."""
+        timestamp = _now()
+        rows = [
+            (item['key'], item['value'], self.note_memory_type, timestamp, timestamp,
+             timestamp, item['metadata'])
+            for item in plan['write']
+        ]
+        with conn:
+            for start in range(0, len(rows), self.batch_size):
+                conn.executemany(
+                    """INSERT INTO memories
+                       (key, value, type, created_at, updated_at, accessed_at, metadata)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(key) DO UPDATE SET
+                           value = excluded.value,
+                           type = excluded.type,
+                           updated_at = excluded.updated_at,
+                           metadata = excluded.metadata""",
+                    rows[start:start + self.batch_size]
+                )
+        for item in plan['write']:
+            state['imported'][item['identifier']] = {
+                'mtime_ns': item['mtime_ns'],
+                'updated_at': timestamp
+            }
+        for item in plan['keep']:
+            state['imported'][item['identifier']] = {
+                'mtime_ns': item['mtime_ns'],
+                'updated_at': item['updated_at']
+            }
+
+    # ----- public API -----
+
+    def sync(self, direction: str = 'both', dry_run: bool = False,
+             prefer: Optional[str] = None) -> Dict[str, Any]:
+        """Run an incremental sync.
+
+        ``direction`` is 'both', 'to_vault' or 'to_brain'. With ``dry_run``
+        nothing is written; the result lists what would change. Conflicts are
+        reported and held back unless ``prefer`` is 'brain' or 'vault', which
+        resolves them in favour of that side.
+        """
+        if prefer not in (None, 'brain', 'vault'):
+            return {'error': f"Unknown prefer value: {prefer}"}
+        try:
+            state = self._load_state()
+            conn = sqlite3.connect(self.brain_db_path)
+            try:
+                export_plan = {'write': [], 'adopt': [], 'conflicts': [], 'unchanged': 0}
+                import_plan = {'write': [], 'keep': [], 'conflicts': [], 'unchanged': 0}
+                if direction in ('both', 'to_vault'):
+                    export_plan = self._plan_export(conn, state, prefer)
+                if direction in ('both', 'to_brain'):
+                    import_plan = self._plan_import(conn, state, prefer)
+
+                if not dry_run:
+                    self._apply_export(conn, export_plan, state)
+                    self._apply_import(conn, import_plan, state)
+                    if any(export_plan[k] for k in ('write', 'adopt')) or \
+                            any(import_plan[k] for k in ('write', 'keep')):
+                        self._save_state(state)
+            finally:
+                conn.close()
+
+            return {
+                'success': True,
+                'dry_run': dry_run,
+                'to_vault': {
+                    'written': [str(item['path'].relative_to(self.vault_path))
+                                for item in export_plan['write']],
+                    'unchanged': export_plan['unchanged']
+                },
+                'to_brain': {
+                    'written': [item['key'] for item in import_plan['write']] +
+                               [item['key'] for item in export_plan['adopt']],
+                    'unchanged': import_plan['unchanged']
+                },
+                'kept': [NOTE_KEY_PREFIX + item['identifier'] for item in import_plan['keep']],
+                'conflicts': export_plan['conflicts'] + import_plan['conflicts']
+            }
+        except Exception as e:
+            return {'error': str(e)}
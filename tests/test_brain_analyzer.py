@@ -0,0 +1,99 @@
+"""
+Tests for near-duplicate detection and streamed vault analysis.
+
+Run with: python -m pytest tests/test_brain_analyzer.py
+"""
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from obsidian_integration.brain_analyzer import BrainAnalyzer
+from obsidian_integration.ndjson_stream import collect
+
+
+BASE = ("The quarterly planning meeting covered the migration of the billing service "
+        "to the new cluster, the rollout schedule for the mobile release, hiring for "
+        "the platform team and the budget review that finance asked for last week. ")
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vault = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_note(self, name, text):
+        (self.vault / name).write_text(text, encoding='utf-8')
+
+    def test_near_duplicates_cluster_and_distinct_note_does_not(self):
+        self.write_note('meeting.md', BASE * 3)
+        self.write_note('meeting copy.md', BASE * 3 + 'Action items follow.')
+        self.write_note('recipe.md', 'Whisk the eggs with sugar, fold in flour and bake '
+                                     'at a moderate heat until golden on top. ' * 3)
+
+        result = BrainAnalyzer(str(self.vault)).find_duplicates(threshold=0.8)
+
+        self.assertEqual(result['cluster_count'], 1)
+        cluster = result['clusters'][0]
+        # The longer note is kept
+        self.assertEqual(cluster['keep'], 'note:meeting copy')
+        self.assertEqual(cluster['merge'], ['note:meeting'])
+        self.assertGreaterEqual(cluster['min_similarity'], 0.8)
+        self.assertEqual(result['documents_scanned'], 3)
+
+    def test_memories_are_compared_with_notes(self):
+        self.write_note('meeting.md', BASE * 3)
+        db_path = str(self.vault / 'brain.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE memories (key TEXT, value TEXT, updated_at TEXT)")
+            conn.execute("INSERT INTO memories VALUES ('meeting', ?, '2026-01-01')", (BASE * 3,))
+
+        result = BrainAnalyzer(str(self.vault), brain_db_path=db_path).find_duplicates()
+
+        self.assertEqual(result['cluster_count'], 1)
+        self.assertEqual(sorted([result['clusters'][0]['keep']] + result['clusters'][0]['merge']),
+                         ['memory:meeting', 'note:meeting'])
+
+    def test_signatures_are_cached_and_reports_skipped(self):
+        self.write_note('meeting.md', BASE * 3)
+        self.write_note('meeting copy.md', BASE * 3)
+        analyzer = BrainAnalyzer(str(self.vault))
+
+        first = analyzer.find_duplicates(save_report=True)
+        self.assertEqual(first['signatures_recomputed'], 2)
+        self.assertTrue((self.vault / '_duplicates_report.md').exists())
+
+        second = analyzer.find_duplicates(save_report=True)
+        self.assertEqual((second['signatures_recomputed'], second['documents_scanned']), (0, 2))
+        self.assertEqual(second['cluster_count'], 1)
+
+
+class IterAnalysisTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vault = Path(self.tmp.name)
+        for i in range(10):
+            (self.vault / f"orphan{i}.md").write_text('nothing links here', encoding='utf-8')
+        (self.vault / 'hub.md').write_text('see [[orphan0]] and [[orphan1]]', encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_linked_only_applies_before_limit(self):
+        items, totals = collect(BrainAnalyzer(str(self.vault)).iter_analysis(
+            ['connections'], limit=3, fields=['note', 'links'], linked_only=True))
+
+        self.assertEqual(items, [{'section': 'connections', 'note': 'hub',
+                                  'links': ['orphan0', 'orphan1']}])
+        self.assertEqual((totals['total_notes'], totals['linked_notes'], totals['orphan_count']),
+                         (11, 1, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
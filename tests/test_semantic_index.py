@@ -0,0 +1,126 @@
+"""
+Tests for the incremental TF-IDF semantic index.
+
+Run with: python -m pytest tests/test_semantic_index.py
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from obsidian_integration.semantic_index import SemanticIndex
+
+
+WORDS = ['river', 'stone', 'garden', 'lamp', 'window', 'copper', 'meadow', 'signal',
+         'harbor', 'violet', 'engine', 'orchard', 'canvas', 'thunder', 'pepper', 'ladder']
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class SemanticIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vault = Path(self.tmp.name) / 'vault'
+        self.vault.mkdir()
+        rng = random.Random(0)
+        for i in range(40):
+            words = rng.choices(WORDS, k=30)
+            self.write_note(f"note{i:02d}.md", ' '.join(words))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_note(self, name, text):
+        path = self.vault / name
+        path.write_text(text, encoding='utf-8')
+        return path
+
+    def index(self, **kwargs):
+        kwargs.setdefault('n_features', 2 ** 12)
+        kwargs.setdefault('n_components', 8)
+        return SemanticIndex(None, str(self.vault), **kwargs)
+
+    def paths(self, hits):
+        return [hit['path'] for hit in hits]
+
+    def test_unseen_term_matches_nothing(self):
+        index = self.index()
+        index.update()
+        self.assertEqual(index.search('zeppelin'), [])
+
+    def test_term_added_after_fit_is_found(self):
+        index = self.index(refit_fraction=0.5)
+        index.update()
+        self.write_note('new.md', 'zeppelin zeppelin airship')
+        self.write_note('newer.md', 'the zeppelin hangar')
+
+        result = index.update()
+        self.assertFalse(result['refit'])
+        self.assertEqual(index.fitted_rows, 40)
+        self.assertEqual(self.paths(index.search('zeppelin', 5)), ['new.md', 'newer.md'])
+
+        related = index.related('new.md', 3)['related']
+        self.assertEqual(self.paths(related)[0], 'newer.md')
+        self.assertGreater(related[0]['final_score'], 0.3)
+
+    def test_reloaded_index_matches(self):
+        index = self.index(refit_fraction=0.5)
+        index.update()
+        self.write_note('new.md', 'zeppelin airship')
+        index.update()
+
+        reloaded = self.index(refit_fraction=0.5)
+        self.assertEqual(reloaded.fitted_rows, index.fitted_rows)
+        self.assertEqual(self.paths(reloaded.search('zeppelin')), ['new.md'])
+
+    def test_refit_above_churn_threshold(self):
+        index = self.index(refit_fraction=0.1)
+        index.update()
+        for i in range(3):
+            self.write_note(f"extra{i}.md", 'zeppelin ' + WORDS[i])
+        self.assertFalse(index.update()['refit'])
+
+        for i in range(3, 6):
+            self.write_note(f"extra{i}.md", 'zeppelin ' + WORDS[i])
+        result = index.update()
+        self.assertTrue(result['refit'])
+        self.assertEqual(index.fitted_rows, 46)
+        # After the refit the basis knows the term; the reduced space ranks it first
+        top = self.paths(index.search('zeppelin', 6))
+        self.assertEqual(sorted(top), [f"extra{i}.md" for i in range(6)])
+
+    def test_removed_note_is_dropped(self):
+        index = self.index()
+        index.update()
+        (self.vault / 'note00.md').unlink()
+
+        result = index.update()
+        self.assertEqual((result['removed'], result['indexed']), (1, 39))
+        self.assertIsNone(index.resolve('note00'))
+
+    def test_unchanged_update_only_moves_the_stamp(self):
+        index = self.index()
+        index.update()
+        stamp = index._stamp_path()
+        old_time = index.index_path.stat().st_mtime - 1000
+        os.utime(index.index_path, (old_time, old_time))
+        os.utime(stamp, (old_time, old_time))
+        mtime_ns = index.index_path.stat().st_mtime_ns
+        self.assertTrue(self.index().is_stale(300))
+
+        self.assertEqual(index.update()['changed'], 0)
+        self.assertEqual(index.index_path.stat().st_mtime_ns, mtime_ns)
+        self.assertFalse(self.index().is_stale(300))
+
+
+if __name__ == '__main__':
+    unittest.main()
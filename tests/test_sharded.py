@@ -0,0 +1,145 @@
+"""
+Tests for fanning search and analysis out across shards.
+
+Run with: python -m pytest tests/test_sharded.py
+"""
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from obsidian_integration.ndjson_stream import collect
+from obsidian_integration.sharded import ShardedBrain
+
+
+class FakeSearcher:
+    """Stands in for UnifiedSearch with canned results and an optional delay."""
+
+    def __init__(self, merged, delay=0.0):
+        self.merged = merged
+        self.delay = delay
+
+    def search(self, query, limit, source, mode):
+        time.sleep(self.delay)
+        return {'merged': self.merged[:limit]}
+
+
+class ShardedBrainTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_vault(self, name, notes):
+        vault = self.root / name
+        vault.mkdir()
+        for note, text in notes.items():
+            (vault / f"{note}.md").write_text(text, encoding='utf-8')
+        return str(vault)
+
+    def brain_with(self, searchers, **timeouts):
+        brain = ShardedBrain(default_timeout=1.0)
+        for name, searcher in searchers.items():
+            shard = brain.register(name, vault_path=self.make_vault(name, {}),
+                                   timeout=timeouts.get(name))
+            shard._searcher = searcher
+        return brain
+
+    def note(self, title, score=None):
+        hit = {'source': 'obsidian', 'type': 'note', 'title': title, 'path': f"{title}.md"}
+        if score is not None:
+            hit['final_score'] = score
+        return hit
+
+    def test_register_rejects_missing_paths(self):
+        brain = ShardedBrain()
+        with self.assertRaises(ValueError):
+            brain.register('none')
+        with self.assertRaises(ValueError):
+            brain.register('typo', vault_path=str(self.root / 'missing'))
+        with self.assertRaises(ValueError):
+            brain.register('typo', brain_db_path=str(self.root / 'missing.db'))
+        self.assertFalse((self.root / 'missing.db').exists())
+
+    def test_keyword_results_interleave(self):
+        brain = self.brain_with({
+            'a': FakeSearcher([self.note('a1'), self.note('a2'), self.note('a3')]),
+            'b': FakeSearcher([self.note('b1')])
+        })
+        result = brain.search('x', limit=3)
+
+        self.assertEqual([(r['shard'], r['title']) for r in result['merged']],
+                         [('a', 'a1'), ('b', 'b1'), ('a', 'a2')])
+        self.assertEqual(result['shards']['a']['status'], 'ok')
+
+    def test_scored_results_merge_by_score(self):
+        brain = self.brain_with({
+            'a': FakeSearcher([self.note('a1', 0.5), self.note('a2', 0.1)]),
+            'b': FakeSearcher([self.note('b1', 0.9)])
+        })
+        result = brain.search('x', limit=2, mode='semantic')
+        self.assertEqual([r['title'] for r in result['merged']], ['b1', 'a1'])
+
+    def test_slow_shard_times_out(self):
+        brain = self.brain_with({
+            'fast': FakeSearcher([self.note('f1')]),
+            'slow': FakeSearcher([self.note('s1')], delay=0.5)
+        }, slow=0.1)
+        started = time.monotonic()
+        result = brain.search('x')
+
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(result['shards']['slow']['status'], 'timeout')
+        self.assertEqual(result['shards']['fast']['status'], 'ok')
+        self.assertEqual([r['title'] for r in result['merged']], ['f1'])
+
+    def test_result_after_deadline_counts_as_timeout(self):
+        # The slow shard keeps the merge waiting past the quick shard's deadline
+        brain = self.brain_with({
+            'late': FakeSearcher([self.note('l1')], delay=0.3),
+            'slow': FakeSearcher([self.note('s1')], delay=0.4)
+        }, late=0.1, slow=1.0)
+        result = brain.search('x')
+
+        self.assertEqual(result['shards']['late']['status'], 'timeout')
+        self.assertEqual([r['title'] for r in result['merged']], ['s1'])
+
+    def test_errors_inside_a_shard_are_reported(self):
+        brain = self.brain_with({
+            'broken': FakeSearcher([{'source': 'brain', 'error': 'no such table: memories'}]),
+            'fine': FakeSearcher([self.note('ok')])
+        })
+        result = brain.search('x')
+
+        self.assertEqual(result['shards']['broken']['status'], 'error')
+        self.assertIn('no such table', result['shards']['broken']['error'])
+        self.assertEqual([r['title'] for r in result['merged']], ['ok'])
+
+    def test_analyze_aggregates_shards(self):
+        brain = ShardedBrain()
+        brain.register('a', vault_path=self.make_vault('a', {
+            'hub': 'see [[x]] and [[y]]', 'x': 'plain', 'lonely': 'nothing'}))
+        brain.register('b', vault_path=self.make_vault('b', {'solo': 'alone'}))
+
+        full = brain.analyze('full')
+        aggregate = full['aggregate']
+        self.assertEqual(aggregate['connections']['total_notes'], 4)
+        self.assertEqual(aggregate['connections']['total_links'], 2)
+        self.assertEqual(sorted(aggregate['orphans']['orphans']), ['a:lonely', 'b:solo'])
+        self.assertEqual(aggregate['hubs'][0]['note'], 'a:hub')
+        self.assertEqual(aggregate['patterns']['note_count'], 4)
+        self.assertEqual({i['shard'] for i in aggregate['insights']}, {'a', 'b'})
+        self.assertEqual({s['status'] for s in full['shards'].values()}, {'ok'})
+
+        items, totals = collect(brain.iter_analysis('connections', limit=10))
+        self.assertEqual([i['note'] for i in items], ['a:hub'])
+        self.assertEqual((totals['total_notes'], totals['linked_notes']), (4, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
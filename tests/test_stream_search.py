@@ -0,0 +1,67 @@
+"""
+Tests for the index-free streaming note search.
+
+Run with: python -m pytest tests/test_stream_search.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from obsidian_integration.stream_search import CHUNK_SIZE, StreamingSearch
+
+
+class StreamingSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.vault = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_note(self, relative, content):
+        path = self.vault / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def paths(self, query, **kwargs):
+        results = StreamingSearch(str(self.vault), max_workers=1).search(query, 20, **kwargs)
+        return sorted(r['path'] for r in results)
+
+    def test_needle_straddling_chunk_boundary(self):
+        # 'Zeppelin' starts three bytes before the end of the first chunk
+        content = b'x' * (CHUNK_SIZE - 3) + b'ZepPELIN' + b'y' * CHUNK_SIZE
+        self.write_note('large.md', content)
+        self.write_note('other.md', b'x' * (CHUNK_SIZE * 2))
+
+        self.assertEqual(self.paths('zeppelin'), ['large.md'])
+
+    def test_needle_straddling_small_chunks(self):
+        self.write_note('small.md', b'abcdefgh needle ijkl')
+        searcher = StreamingSearch(str(self.vault), max_workers=1, chunk_size=8)
+        for offset in range(len('needle')):
+            self.assertTrue(searcher._contains(b'.' * (8 - offset) + b'NEEDLE', 14 - offset, b'needle'))
+        self.assertEqual([r['path'] for r in searcher.search('needle', 5)], ['small.md'])
+
+    def test_title_and_non_ascii_queries(self):
+        self.write_note('Café notes.md', 'nothing here'.encode('utf-8'))
+        self.write_note('body.md', 'Über alles'.encode('utf-8'))
+
+        self.assertEqual(self.paths('café'), ['Café notes.md'])
+        self.assertEqual(self.paths('über'), ['body.md'])
+        self.assertEqual(self.paths(r'al+es', regex=True), ['body.md'])
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'needs symlink support')
+    def test_directory_symlinks_are_not_followed(self):
+        self.write_note('a/x.md', b'hi there')
+        os.symlink('..', self.vault / 'a' / 'up')
+
+        self.assertEqual(self.paths('hi'), ['a/x.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()
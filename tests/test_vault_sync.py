@@ -0,0 +1,188 @@
+"""
+Tests for the incremental brain.db <-> vault sync engine.
+
+Run with: python -m pytest tests/test_vault_sync.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from obsidian_integration.vault_sync import VaultSync
+
+
+SCHEMA = """
+CREATE TABLE memories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE NOT NULL,
+    value TEXT NOT NULL,
+    type TEXT DEFAULT 'general',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    accessed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    metadata TEXT DEFAULT '{}'
+)
+"""
+
+
+class VaultSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.vault = root / 'vault'
+        self.vault.mkdir()
+        self.db_path = str(root / 'brain.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(SCHEMA)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def put_memory(self, key, value, updated_at, memory_type='project'):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """INSERT INTO memories (key, value, type, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+                                                  updated_at = excluded.updated_at""",
+                (key, value, memory_type, updated_at, updated_at)
+            )
+
+    def memory(self, key):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT value, updated_at FROM memories WHERE key = ?",
+                                (key,)).fetchone()
+
+    def edit_note(self, path, text):
+        """Rewrite a note and force its mtime forward."""
+        stat = path.stat()
+        path.write_text(text, encoding='utf-8')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def syncer(self, **kwargs):
+        return VaultSync(self.db_path, str(self.vault), memory_types=['project'], **kwargs)
+
+    def state(self):
+        return json.loads((self.vault / '.brain-index' / 'sync_state.json').read_text())
+
+    def test_export_advances_watermark(self):
+        self.put_memory('alpha', 'first', '2026-01-01T00:00:00.000Z')
+        self.put_memory('beta', 'second', '2026-01-02T00:00:00.000Z')
+
+        result = self.syncer().sync(direction='to_vault')
+        self.assertEqual(len(result['to_vault']['written']), 2)
+        self.assertEqual(self.state()['memory_watermarks']['project'], '2026-01-02T00:00:00.000Z')
+
+        # Nothing changed, so nothing is rewritten
+        result = self.syncer().sync(direction='to_vault')
+        self.assertEqual(result['to_vault']['written'], [])
+
+        self.put_memory('gamma', 'third', '2026-01-03T00:00:00.000Z')
+        result = self.syncer().sync(direction='to_vault')
+        self.assertEqual(len(result['to_vault']['written']), 1)
+        self.assertEqual(self.state()['memory_watermarks']['project'], '2026-01-03T00:00:00.000Z')
+
+    def test_dry_run_writes_nothing(self):
+        self.put_memory('alpha', 'first', '2026-01-01T00:00:00.000Z')
+        folder = self.vault / 'Notes'
+        folder.mkdir()
+        (folder / 'idea.md').write_text('an idea', encoding='utf-8')
+
+        result = VaultSync(self.db_path, str(self.vault), memory_types=['project'],
+                           note_folders=['Notes']).sync(dry_run=True)
+
+        self.assertTrue(result['dry_run'])
+        self.assertEqual(len(result['to_vault']['written']), 1)
+        self.assertEqual(result['to_brain']['written'], ['obsidian:Notes/idea'])
+        self.assertFalse((self.vault / 'Brain-Memories').exists())
+        self.assertFalse((self.vault / '.brain-index' / 'sync_state.json').exists())
+        self.assertIsNone(self.memory('obsidian:Notes/idea'))
+
+    def test_sanitized_keys_do_not_collide(self):
+        self.put_memory('project:foo', 'colon', '2026-01-01T00:00:00.000Z')
+        self.put_memory('project-foo', 'dash', '2026-01-01T00:00:00.000Z')
+
+        result = self.syncer().sync(direction='to_vault')
+        written = result['to_vault']['written']
+        self.assertEqual(len(set(written)), 2)
+        state = self.state()['exported']
+        self.assertNotEqual(state['project:foo']['path'], state['project-foo']['path'])
+        bodies = {(self.vault / path).read_text(encoding='utf-8').rstrip().rsplit('\n', 1)[-1]
+                  for path in written}
+        self.assertEqual(bodies, {'colon', 'dash'})
+
+    def test_conflict_is_held_back(self):
+        self.put_memory('alpha', 'first', '2026-01-01T00:00:00.000Z')
+        self.syncer().sync(direction='to_vault')
+        note = self.vault / self.state()['exported']['alpha']['path']
+
+        self.edit_note(note, 'edited in vault')
+        self.put_memory('alpha', 'changed in brain', '2026-01-05T00:00:00.000Z')
+        self.put_memory('beta', 'unrelated', '2026-01-06T00:00:00.000Z')
+
+        for _ in range(2):
+            result = self.syncer().sync(direction='to_vault')
+            self.assertEqual([c['key'] for c in result['conflicts']], ['alpha'])
+            self.assertEqual(note.read_text(encoding='utf-8'), 'edited in vault')
+            # The watermark never moves past the unresolved conflict
+            self.assertEqual(self.state()['memory_watermarks']['project'],
+                             '2026-01-05T00:00:00.000Z')
+
+    def test_prefer_brain_overwrites_note(self):
+        self.put_memory('alpha', 'first', '2026-01-01T00:00:00.000Z')
+        self.syncer().sync(direction='to_vault')
+        note = self.vault / self.state()['exported']['alpha']['path']
+        self.edit_note(note, 'edited in vault')
+        self.put_memory('alpha', 'changed in brain', '2026-01-05T00:00:00.000Z')
+
+        result = self.syncer().sync(direction='to_vault', prefer='brain')
+        self.assertEqual(result['conflicts'], [])
+        self.assertTrue(note.read_text(encoding='utf-8').endswith('changed in brain'))
+        self.assertEqual(self.syncer().sync(direction='to_vault')['conflicts'], [])
+
+    def test_prefer_vault_adopts_note(self):
+        self.put_memory('alpha', 'first', '2026-01-01T00:00:00.000Z')
+        self.syncer().sync(direction='to_vault')
+        note = self.vault / self.state()['exported']['alpha']['path']
+        self.edit_note(note, '---\nbrain_key: alpha\n---\n\nedited in vault\n')
+        self.put_memory('alpha', 'changed in brain', '2026-01-05T00:00:00.000Z')
+
+        result = self.syncer().sync(direction='to_vault', prefer='vault')
+        self.assertEqual(result['conflicts'], [])
+        self.assertEqual(result['to_brain']['written'], ['alpha'])
+        self.assertEqual(self.memory('alpha')[0], 'edited in vault')
+
+        # The adopted memory is now in sync with its note
+        result = self.syncer().sync(direction='to_vault')
+        self.assertEqual((result['to_vault']['written'], result['conflicts']), ([], []))
+
+    def test_import_conflict_and_prefer_brain(self):
+        folder = self.vault / 'Notes'
+        folder.mkdir()
+        note = folder / 'idea.md'
+        note.write_text('an idea', encoding='utf-8')
+        syncer = VaultSync(self.db_path, str(self.vault), note_folders=['Notes'])
+
+        syncer.sync(direction='to_brain')
+        self.assertEqual(self.memory('obsidian:Notes/idea')[0], 'an idea')
+
+        self.edit_note(note, 'a better idea')
+        self.put_memory('obsidian:Notes/idea', 'edited in brain', '2030-01-01T00:00:00.000Z')
+
+        result = syncer.sync(direction='to_brain')
+        self.assertEqual([c['key'] for c in result['conflicts']], ['obsidian:Notes/idea'])
+        self.assertEqual(self.memory('obsidian:Notes/idea')[0], 'edited in brain')
+
+        result = syncer.sync(direction='to_brain', prefer='brain')
+        self.assertEqual(result['kept'], ['obsidian:Notes/idea'])
+        self.assertEqual(self.memory('obsidian:Notes/idea')[0], 'edited in brain')
+        self.assertEqual(syncer.sync(direction='to_brain')['conflicts'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()